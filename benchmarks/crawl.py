@@ -0,0 +1,155 @@
+"""
+Benchmark de rastreo contra el sitio sintético local
+
+Uso:
+    python -m benchmarks.crawl --pages 2000 --latency 20 --configs threads,async
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_site import SyntheticSiteServer, build_parser, graph_from_args
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Argumentos del escáner para cada configuración medida
+CONFIGS = {
+    'threads': ['--engine', 'threads'],
+    'threads-16': ['--engine', 'threads', '--concurrency', '16', '--verify-concurrency', '32'],
+    'async': ['--engine', 'async'],
+    'async-lxml': ['--engine', 'async', '--parser', 'lxml'],
+    'parse-pool': ['--engine', 'threads', '--concurrency', '16', '--parse-workers', '2'],
+}
+
+
+def percentile(values, q):
+    """Percentil q (0-100) por el método del rango más cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_scanner(url, scanner_args, output_dir):
+    """
+    Ejecuta el escáner en un proceso hijo.
+
+    Returns:
+        (segundos, código de salida, RSS máximo en KB, segundos de CPU); RSS y CPU
+        son None en plataformas sin os.wait4
+    """
+    command = [sys.executable, '-m', 'webspectre_scanner', url, '-o', output_dir, '--no-pdf'] + scanner_args
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+
+    started = time.perf_counter()
+    proc = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, env=env, cwd=ROOT)
+    if not hasattr(os, 'wait4'):
+        code = proc.wait()
+        return time.perf_counter() - started, code, None, None
+
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - started
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return elapsed, proc.returncode, usage.ru_maxrss, usage.ru_utime + usage.ru_stime
+
+
+def measure(server, name, scanner_args, depth):
+    """Mide una configuración y devuelve un diccionario de resultados"""
+    server.reset()
+    with tempfile.TemporaryDirectory(prefix='webspectre-bench-') as output_dir:
+        elapsed, code, rss_kb, cpu = run_scanner(server.url, ['-d', str(depth)] + scanner_args, output_dir)
+    requests, latencies = server.snapshot()
+
+    pages = requests['page']
+    total = sum(requests.values())
+    return {
+        'config': name,
+        'args': scanner_args,
+        'exit_code': code,
+        'seconds': round(elapsed, 3),
+        'pages': pages,
+        'requests': total,
+        'requests_by_kind': dict(requests),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else 0.0,
+        'requests_per_page': round(total / pages, 2) if pages else 0.0,
+        'latency_p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'latency_p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'peak_rss_mb': round(rss_kb / 1024, 1) if rss_kb is not None else None,
+        'cpu_sec': round(cpu, 3) if cpu is not None else None,
+    }
+
+
+def print_table(results):
+    columns = [
+        ('config', 'Config'), ('pages', 'Páginas'), ('pages_per_sec', 'Pág/s'),
+        ('requests_per_page', 'Pet/pág'), ('latency_p50_ms', 'p50 ms'),
+        ('latency_p99_ms', 'p99 ms'), ('peak_rss_mb', 'RSS MB'), ('cpu_sec', 'CPU s'),
+        ('seconds', 'Total s'),
+    ]
+    rows = [[title for _, title in columns]]
+    rows += [['-' if r[key] is None else str(r[key]) for key, _ in columns] for r in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print('  '.join(cell.rjust(width) if i else cell.ljust(width)
+                        for i, (cell, width) in enumerate(zip(row, widths))))
+
+
+def main():
+    parser = build_parser("Mide el rendimiento del escáner contra un sitio sintético local")
+    parser.add_argument('--configs', default='threads,async',
+                        help=f"Configuraciones separadas por comas: {', '.join(CONFIGS)} (predeterminado: threads,async)")
+    parser.add_argument('--scanner-args', default='',
+                        help='Argumentos extra para el escáner en todas las configuraciones (ej. "--rate 50")')
+    parser.add_argument('--politeness', action='store_true',
+                        help='Mantener el limitador de ritmo por host (por defecto se usa --no-politeness)')
+    parser.add_argument('-d', '--depth', type=int, default=3, help='Profundidad de rastreo (predeterminado: 3)')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeticiones de cada configuración (predeterminado: 1)')
+    parser.add_argument('--json', metavar='PATH', help='Guardar los resultados en JSON para comparar ejecuciones')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.configs.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CONFIGS]
+    if unknown:
+        parser.error(f"Configuraciones desconocidas: {', '.join(unknown)}")
+
+    extra = args.scanner_args.split()
+    if not args.politeness:
+        extra.append('--no-politeness')
+
+    graph = graph_from_args(args)
+    results = []
+    with SyntheticSiteServer(graph) as server:
+        print(f"[*] Sitio sintético en {server.url}: {graph.reachable()} páginas, fanout {graph.fanout}, "
+              f"latencia {args.latency:g}ms, enlaces rotos {args.broken_rate:g}, errores 500 {args.error_rate:g}")
+        for name in names:
+            for run in range(args.repeat):
+                label = name if args.repeat == 1 else f"{name}#{run + 1}"
+                print(f"[~] Midiendo {label}...")
+                result = measure(server, label, CONFIGS[name] + extra, args.depth)
+                if result['exit_code'] != 0:
+                    print(f"[!] {label} terminó con código {result['exit_code']}")
+                results.append(result)
+
+    print()
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'site': {key: getattr(args, key) for key in
+                         ('pages', 'fanout', 'site_depth', 'page_size', 'latency', 'jitter', 'broken_rate', 'error_rate')},
+                'depth': args.depth,
+                'results': results
+            }, f, indent=2)
+        print(f"\n[+] Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
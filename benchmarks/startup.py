@@ -0,0 +1,113 @@
+"""
+Benchmark del coste de arranque: tiempo de importación y de `-h`
+
+Uso:
+    python -m benchmarks.startup --repeat 10 --max-ms 250
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que se miden importándolos en un intérprete limpio
+MODULES = [
+    'webspectre_scanner.cli',
+    'webspectre_scanner.scanner',
+]
+
+# Dependencias que no deben cargarse al importar el escáner: solo hacen
+# falta para el PDF, el banner, el extractor bs4 o el extractor lxml
+DEFERRED = ('reportlab', 'rich', 'colorama', 'bs4', 'lxml')
+
+
+def child_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    return env
+
+
+def import_profile(module):
+    """
+    Importa un módulo en un proceso nuevo con -X importtime.
+
+    Returns:
+        (microsegundos acumulados del módulo, conjunto de paquetes de primer nivel importados)
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        env=child_env(), cwd=ROOT, text=True, check=True
+    )
+    cumulative = 0
+    packages = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, total, name = line.split('|')
+        if not total.strip().isdigit():
+            continue  # cabecera
+        packages.add(name.strip().split('.')[0])
+        if name.strip() == module:
+            cumulative = int(total)
+    return cumulative, packages
+
+
+def help_seconds():
+    """Segundos de reloj de `python -m webspectre_scanner -h`, con el arranque del intérprete"""
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-m', 'webspectre_scanner', '-h'],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env=child_env(), cwd=ROOT, check=True
+    )
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el coste de arranque del escáner")
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones de cada medida (predeterminado: 5)')
+    parser.add_argument('--max-ms', type=float, metavar='MS',
+                        help='Fallar si la mediana de importación de webspectre_scanner.scanner supera MS milisegundos')
+    parser.add_argument('--json', metavar='PATH', help='Guardar los resultados en JSON para comparar ejecuciones')
+    args = parser.parse_args()
+
+    results = {}
+    loaded = set()
+    for module in MODULES:
+        samples = []
+        for _ in range(max(1, args.repeat)):
+            micros, packages = import_profile(module)
+            samples.append(micros / 1000)
+            loaded |= packages
+        results[module] = round(statistics.median(samples), 2)
+        print(f"[~] import {module}: {results[module]:.1f} ms (mediana de {len(samples)})")
+
+    help_ms = round(statistics.median(help_seconds() for _ in range(max(1, args.repeat))) * 1000, 2)
+    print(f"[~] python -m webspectre_scanner -h: {help_ms:.1f} ms")
+
+    failures = []
+    eager = sorted(loaded.intersection(DEFERRED))
+    if eager:
+        failures.append(f"dependencias importadas al arrancar: {', '.join(eager)}")
+    scanner_ms = results['webspectre_scanner.scanner']
+    if args.max_ms is not None and scanner_ms > args.max_ms:
+        failures.append(f"importar el escáner cuesta {scanner_ms:.1f} ms (límite {args.max_ms:g} ms)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'import_ms': results, 'help_ms': help_ms, 'eager_deferred': eager}, f, indent=2)
+        print(f"\n[+] Resultados guardados en {args.json}")
+
+    for failure in failures:
+        print(f"[!] {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Sitio web sintético y determinista para medir el rendimiento del escáner
+"""
+
+import argparse
+import hashlib
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SiteGraph:
+    """
+    Grafo de páginas con forma de árbol k-ario más enlaces cruzados.
+
+    La página 0 es la raíz y los hijos de la página i son i*fanout+1 ...
+    i*fanout+fanout, limitados a `pages` páginas y a `depth` niveles. Cada
+    página enlaza además a su padre, a la raíz, a una página al azar y a un
+    recurso no HTML, de modo que el escáner tenga que deduplicar. Todo se
+    deriva de un hash del identificador, así que dos ejecuciones con los
+    mismos parámetros generan exactamente el mismo sitio.
+
+    Args:
+        pages: Número máximo de páginas HTML
+        fanout: Enlaces a páginas hijas por página
+        depth: Niveles del árbol (la raíz es el nivel 0)
+        page_size: Tamaño aproximado en bytes de cada página
+        latency: Retardo base de cada respuesta en segundos
+        jitter: Retardo adicional máximo en segundos
+        broken_rate: Fracción de enlaces hijos que apuntan a páginas 404
+        error_rate: Fracción de páginas que responden 500 (nunca la raíz)
+    """
+
+    def __init__(self, pages=1000, fanout=8, depth=4, page_size=8192,
+                 latency=0.0, jitter=0.0, broken_rate=0.0, error_rate=0.0):
+        self.pages = max(1, pages)
+        self.fanout = max(1, fanout)
+        self.depth = depth
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.broken_rate = broken_rate
+        self.error_rate = error_rate
+        self.levels = [self._level(i) for i in range(self.pages)]
+
+    def _level(self, page_id):
+        level = 0
+        while page_id > 0:
+            page_id = (page_id - 1) // self.fanout
+            level += 1
+        return level
+
+    @staticmethod
+    def _roll(*key) -> float:
+        """Número pseudoaleatorio estable en [0, 1) para una clave"""
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') / 2 ** 64
+
+    def delay(self, path: str) -> float:
+        return self.latency + self.jitter * self._roll('delay', path)
+
+    def reachable(self) -> int:
+        """Páginas HTML enlazadas dentro de la profundidad del sitio"""
+        return sum(1 for level in self.levels if level <= self.depth)
+
+    def render(self, path: str):
+        """Devuelve (status, content_type, body) para una ruta"""
+        if path.startswith('/asset/'):
+            return 200, 'application/pdf', b'%PDF-1.4\n' + b'0' * 2048
+        if path.startswith('/broken/'):
+            return 404, 'text/html; charset=utf-8', b'<html><body>Not found</body></html>'
+
+        page_id = self._page_id(path)
+        if page_id is None:
+            return 404, 'text/html; charset=utf-8', b'<html><body>Not found</body></html>'
+        if page_id and self._roll('error', page_id) < self.error_rate:
+            return 500, 'text/html; charset=utf-8', b'<html><body>Server error</body></html>'
+
+        links = []
+        if self.levels[page_id] < self.depth:
+            for k in range(1, self.fanout + 1):
+                child = page_id * self.fanout + k
+                if self._roll('broken', page_id, k) < self.broken_rate:
+                    links.append(f'/broken/{page_id}-{k}')
+                elif child < self.pages:
+                    links.append(f'/n/{child}/')
+        if page_id:
+            links.append(f'/n/{(page_id - 1) // self.fanout}/')
+            links.append('/')
+        links.append(f'/n/{int(self._roll("cross", page_id) * self.pages)}/')
+        links.append(f'/asset/{page_id}.pdf')
+
+        anchors = ''.join(f'<li><a href="{link}">{link}</a></li>' for link in links)
+        head = (f'<html><head><title>Page {page_id}</title>'
+                f'<link rel="stylesheet" href="/asset/style.css"></head>'
+                f'<body><h1>Page {page_id}</h1><ul>{anchors}</ul>')
+        filler_size = max(0, self.page_size - len(head) - 20)
+        filler = ('<p>' + 'lorem ipsum dolor sit amet ' * 8 + '</p>') * (filler_size // 230 + 1)
+        return 200, 'text/html; charset=utf-8', (head + filler[:filler_size] + '</body></html>').encode()
+
+    def _page_id(self, path):
+        if path == '/':
+            return 0
+        parts = path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'n' or not parts[1].isdigit():
+            return None
+        page_id = int(parts[1])
+        if page_id >= self.pages or self.levels[page_id] > self.depth:
+            return None
+        return page_id
+
+
+class SyntheticSiteServer:
+    """
+    Servidor HTTP en un hilo propio que sirve un SiteGraph y cuenta las
+    peticiones por método y el tiempo de respuesta de cada una.
+    """
+
+    def __init__(self, graph: SiteGraph, host='127.0.0.1', port=0):
+        self.graph = graph
+        self.lock = threading.Lock()
+        self.reset()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        """Pone a cero los contadores antes de cada medición"""
+        with self.lock:
+            self.requests = Counter()
+            self.latencies = []
+
+    def snapshot(self):
+        """Copia de (contadores, latencias) acumulados desde el último reset"""
+        with self.lock:
+            return Counter(self.requests), list(self.latencies)
+
+    def _record(self, key, elapsed):
+        with self.lock:
+            self.requests[key] += 1
+            self.latencies.append(elapsed)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def _respond(self, send_body):
+                started = time.perf_counter()
+                path = self.path.split('?')[0].split('#')[0]
+                delay = server.graph.delay(path)
+                if delay:
+                    time.sleep(delay)
+
+                status, content_type, body = server.graph.render(path)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+                kind = 'page' if send_body and content_type.startswith('text/html') and status == 200 else self.command
+                server._record(kind, time.perf_counter() - started)
+
+        return Handler
+
+
+def build_parser(description):
+    """Argumentos comunes para describir el sitio sintético"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--pages', type=int, default=1000, help='Páginas HTML del sitio (predeterminado: 1000)')
+    parser.add_argument('--fanout', type=int, default=8, help='Enlaces a páginas hijas por página (predeterminado: 8)')
+    parser.add_argument('--site-depth', type=int, default=4, help='Niveles del sitio (predeterminado: 4)')
+    parser.add_argument('--page-size', type=int, default=8192, help='Bytes por página (predeterminado: 8192)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Retardo de cada respuesta en ms (predeterminado: 0)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Retardo adicional máximo en ms (predeterminado: 0)')
+    parser.add_argument('--broken-rate', type=float, default=0.05, help='Fracción de enlaces rotos (404) (predeterminado: 0.05)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de páginas que responden 500 (predeterminado: 0)')
+    return parser
+
+
+def graph_from_args(args) -> SiteGraph:
+    return SiteGraph(
+        pages=args.pages,
+        fanout=args.fanout,
+        depth=args.site_depth,
+        page_size=args.page_size,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        broken_rate=args.broken_rate,
+        error_rate=args.error_rate
+    )
+
+
+if __name__ == "__main__":
+    parser = build_parser("Sirve el sitio sintético de benchmarks")
+    parser.add_argument('--port', type=int, default=8765, help='Puerto de escucha (predeterminado: 8765)')
+    args = parser.parse_args()
+
+    server = SyntheticSiteServer(graph_from_args(args), port=args.port)
+    print(f"[*] Sitio sintético en {server.url} ({server.graph.reachable()} páginas)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
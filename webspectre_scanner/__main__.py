@@ -4,12 +4,21 @@ Punto de entrada principal para WebSpectre Scanner
 """
 
 from webspectre_scanner.cli import parse_arguments
-from webspectre_scanner.scanner import WebSpectreScanner
 
 def main():
     """Función principal que orquesta el escaneo"""
     args = parse_arguments()
-    scanner = WebSpectreScanner(args)
+    # El escáner (requests, urllib3...) se importa después de validar los
+    # argumentos: -h y los errores de uso no pagan su coste de importación
+    if args.join:
+        from webspectre_scanner.distributed import DistributedWorker
+        scanner = DistributedWorker(args)
+    elif args.targets_file:
+        from webspectre_scanner.batch import BatchScanner
+        scanner = BatchScanner(args)
+    else:
+        from webspectre_scanner.scanner import WebSpectreScanner
+        scanner = WebSpectreScanner(args)
     
     try:
         scanner.run_scan()
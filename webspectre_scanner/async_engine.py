@@ -0,0 +1,387 @@
+"""
+Motor de rastreo asíncrono basado en asyncio
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp es opcional: sin él se usa un pool de hilos
+    aiohttp = None
+
+from webspectre_scanner.extractors import parse_and_normalize_timed
+from webspectre_scanner.frontier import LevelGate
+from webspectre_scanner.scanner import BODY_CHUNK_SIZE, FetchResult
+from webspectre_scanner.transport import aiohttp_trace_config, guess_encoding
+from webspectre_scanner.verifier import HostQueue
+
+
+class AsyncCrawlEngine:
+    """
+    Recorre el sitio con el mismo BFS que WebSpectreScanner.scan_site pero
+    manteniendo cientos de peticiones en vuelo sobre un único event loop.
+
+    Los resultados se escriben directamente en visited, valid_links,
+    invalid_links y errors del escáner, por lo que generate_report no cambia.
+    """
+
+    def __init__(self, scanner, concurrency=100, shared_loop=None):
+        self.scanner = scanner
+        self.concurrency = max(1, concurrency)
+        self.shared_loop = shared_loop
+        self.http = None
+        self.executor = None
+
+    def run(self, start_url, max_depth=2):
+        """Ejecuta el rastreo completo y bloquea hasta terminar"""
+        if self.shared_loop is not None:
+            self.shared_loop.run(self._crawl(start_url, max_depth))
+        else:
+            asyncio.run(self._crawl(start_url, max_depth))
+
+    async def _crawl(self, start_url, max_depth):
+        scanner = self.scanner
+        pages = scanner.new_frontier()
+        gate = LevelGate()
+        checks = HostQueue(scanner.settings['verify_per_host'])
+        initial_pages, initial_checks = scanner.initial_work(start_url, max_depth)
+        for url, depth in initial_pages:
+            pages.push(url, depth)
+            gate.add(depth)
+        for url, depth in initial_checks:
+            checks.push(url, (url, depth))
+        tasks = {}
+        in_flight = Counter()
+        scanner.pending_work = lambda: (
+            pages.items() + [(url, depth) for kind, url, depth, _ in tasks.values() if kind == 'page']
+            + gate.items(),
+            checks.items() + [(url, depth) for kind, url, depth, _ in tasks.values() if kind == 'check']
+        )
+        scanner.metrics.watch('frontier', lambda: len(pages), owner=scanner)
+        scanner.metrics.watch('pages_in_flight', lambda: in_flight['page'], owner=scanner)
+        scanner.metrics.watch('verify_pending', lambda: len(checks) + in_flight['check'], owner=scanner)
+
+        await self._open()
+        try:
+            while pages or len(checks) or tasks:
+                if scanner.cancel.is_set():
+                    raise KeyboardInterrupt
+                while pages and in_flight['page'] < self.concurrency:
+                    url, depth = pages.pop()
+                    task = asyncio.ensure_future(self._scan_page(url))
+                    tasks[task] = ('page', url, depth, None)
+                    in_flight['page'] += 1
+
+                # Las verificaciones tienen su propio límite y turnos por host
+                while in_flight['check'] < scanner.settings['verify_concurrency']:
+                    ready = checks.pop_ready()
+                    if ready is None:
+                        break
+                    host, (url, depth) = ready
+                    task = asyncio.ensure_future(self._check_url_status(url))
+                    tasks[task] = ('check', url, depth, host)
+                    in_flight['check'] += 1
+
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    kind, url, depth, host = tasks.pop(task)
+                    in_flight[kind] -= 1
+
+                    if kind == 'check':
+                        checks.done(host)
+                        is_valid, status = task.result()
+                        scanner.classify(url, is_valid, status)
+                        continue
+
+                    gate.done(url, depth, task.result())
+
+                for url, depth, links in gate.ready():
+                    new_pages, new_checks = scanner.route_links(url, links, depth + 1, max_depth)
+                    for link, link_depth in new_pages:
+                        pages.push(link, link_depth)
+                        gate.add(link_depth)
+                    for link, link_depth in new_checks:
+                        checks.push(link, (link, link_depth))
+
+                scanner.maybe_checkpoint()
+                scanner.stats_ticker.tick()
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            scanner.save_checkpoint()
+            raise
+        finally:
+            scanner.pending_work = None
+            scanner.metrics.unwatch('frontier', 'pages_in_flight', 'verify_pending', owner=scanner)
+            pages.close()
+            await self._close()
+
+    async def _open(self):
+        """Prepara el cliente HTTP asíncrono o el pool de hilos de respaldo"""
+        if aiohttp is None:
+            workers = self.concurrency + self.scanner.settings['verify_concurrency']
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+            return
+
+        if self.shared_loop is not None:
+            self.http = self.shared_loop.client()
+            return
+        self.http = open_client(self.scanner, self.concurrency + self.scanner.settings['verify_concurrency'])
+
+    async def _close(self):
+        # El cliente del lote lo cierra SharedLoop al terminar todos los objetivos
+        if self.http is not None and self.shared_loop is None:
+            await self.http.close()
+        self.http = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def _feedback(self, url, response):
+        """Informa al limitador de ritmo del estado de una respuesta"""
+        self.scanner.rate_limiter.feedback(url, response.status, response.headers.get('Retry-After'))
+
+    async def _check_url_status(self, url):
+        """Versión asíncrona de WebSpectreScanner.check_url_status"""
+        scanner = self.scanner
+        if self.http is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, scanner.check_url_status, url)
+
+        if url in scanner.url_status_cache:
+            scanner.metrics.inc('status_cache', result='hit')
+            return scanner.url_status_cache[url]
+
+        cached = await self._cache_call(scanner.cached_status, url)
+        if cached is not None:
+            scanner.metrics.inc('status_cache', result='persistent')
+            return cached
+
+        scanner.metrics.inc('status_cache', result='miss')
+
+        if scanner.sections.trusted(url):
+            scanner.metrics.inc('section_trusted')
+            return (True, 200)
+
+        try:
+            await scanner.rate_limiter.acquire_async(url)
+            async with self.http.head(
+                url,
+                timeout=aiohttp.ClientTimeout(total=10),
+                allow_redirects=True
+            ) as response:
+                self._feedback(url, response)
+                is_valid = response.status < 400
+                scanner.url_status_cache[url] = (is_valid, response.status)
+                scanner.sections.observe(url, is_valid)
+                if scanner.persistent_cache is not None:
+                    await self._offload(
+                        scanner.persistent_cache.put, url, response.status,
+                        response.headers.get('ETag'), response.headers.get('Last-Modified')
+                    )
+                return (is_valid, response.status)
+        except Exception as e:
+            print(f"\n[!] Error al verificar {url}: {str(e) or type(e).__name__}", flush=True)
+            scanner.url_status_cache[url] = (False, 0)
+            return (False, 0)
+
+    async def _scan_page(self, url):
+        """Descarga una página con un único GET y devuelve sus enlaces"""
+        scanner = self.scanner
+        if self.http is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, scanner.scan_page, url)
+
+        cached = scanner.url_status_cache.get(url)
+        if cached is not None and not cached[0]:
+            scanner.classify(url, False, cached[1])
+            return []
+
+        if scanner.persistent_cache is not None:
+            known = await self._offload(self._from_cache, url)
+            if known is not None:
+                return known
+        headers, entry = await self._cache_call(scanner.conditional_headers, url) or ({}, None)
+        try:
+            await scanner.rate_limiter.acquire_async(url)
+            async with self.http.get(
+                url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
+                self._feedback(url, response)
+                scanner.metrics.inc('pages')
+                if response.status == 304 and entry is not None:
+                    page = scanner.not_modified_page(url, entry)
+                else:
+                    page = FetchResult(
+                        url=url,
+                        status=response.status,
+                        content_type=response.headers.get('Content-Type', ''),
+                        body=b'',
+                        encoding=response.charset or '',  # sin charset, guess_encoding en _process
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+                    # Los cuerpos que no se van a analizar no se descargan
+                    if not scanner.skip_body(page, response.headers.get('Content-Length')):
+                        page = page._replace(body=await self._read_body(url, response))
+        except Exception as e:
+            scanner.fetch_failed(url, e)
+            return []
+
+        # El análisis, la huella y la caché persistente van a un hilo (o al
+        # pool de procesos) para no frenar las peticiones en vuelo
+        if scanner.parse_pool is None or page.links is not None:
+            return await self._offload(self._process, page)
+
+        page = await self._offload(self._prepare_parse, page)
+        if page is None:
+            return []
+        try:
+            loop = asyncio.get_running_loop()
+            links = scanner.record_parse(*await loop.run_in_executor(
+                scanner.parse_pool, parse_and_normalize_timed, *scanner.parse_job(page)
+            ))
+        except Exception as e:
+            scanner.report_page_error(url, e)
+            return []
+        await self._cache_call(scanner.remember, page, links)
+        return scanner.filter_unvisited(links)
+
+    async def _offload(self, func, *args):
+        """Ejecuta trabajo síncrono (análisis, SQLite) en el pool de hilos del loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _cache_call(self, func, *args):
+        """Como _offload, pero solo si hay caché persistente (sin ella func no hace E/S y devuelve None)"""
+        if self.scanner.persistent_cache is None:
+            return None
+        return await self._offload(func, *args)
+
+    def _from_cache(self, url):
+        """Enlaces de una página que la caché persistente resuelve sin petición, o None"""
+        scanner = self.scanner
+        if scanner.reuse_cached_page(url):
+            return []
+        page = scanner.unchanged_page(url)
+        if page is not None:
+            return scanner.process_page(page)
+        return None
+
+    def _process(self, page):
+        return self.scanner.process_page(with_encoding(page))
+
+    def _prepare_parse(self, page):
+        """Clasifica la página; devuelve la página a enviar al pool de procesos, o None"""
+        scanner = self.scanner
+        page = with_encoding(page)
+        if not scanner.classify_page(page):
+            return None
+        if scanner.is_near_duplicate(page.url, scanner.fingerprint(page)):
+            scanner.remember(page, [])
+            return None
+        return page
+
+    async def _read_body(self, url, response):
+        """Lee el cuerpo de una respuesta hasta max_body_size bytes registrando el tiempo de descarga"""
+        started = time.perf_counter()
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(BODY_CHUNK_SIZE):
+            chunk, truncated = self.scanner.clip_chunk(url, size, chunk)
+            chunks.append(chunk)
+            size += len(chunk)
+            if truncated:
+                break
+        self.scanner.metrics.observe('download_seconds', time.perf_counter() - started)
+        self.scanner.metrics.inc('http_bytes', size)
+        return b''.join(chunks)
+
+
+def with_encoding(page):
+    """Completa la codificación de una página sin charset declarado, como fetch_page"""
+    if page.encoding or not page.body:
+        return page
+    return page._replace(encoding=guess_encoding(page.body))
+
+
+def open_client(scanner, connections):
+    """
+    Cliente aiohttp con el pool de conexiones configurado en el escáner.
+    Debe crearse dentro del event loop en el que se va a usar.
+
+    Args:
+        scanner: WebSpectreScanner del que se toman cabeceras, métricas y límites
+        connections: Conexiones simultáneas en total si no hay --max-connections
+    """
+    args = scanner.args
+    connector = aiohttp.TCPConnector(
+        limit=args.max_connections or connections,
+        limit_per_host=scanner.settings['pool_size'],
+        force_close=args.no_keep_alive,
+        ssl=None if scanner.settings['verify_ssl'] else False
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=dict(scanner.session.headers),
+        trace_configs=[aiohttp_trace_config(scanner.metrics)]
+    )
+
+
+class SharedLoop:
+    """
+    Event loop en un hilo propio para los objetivos de un lote con --engine async.
+
+    Cada objetivo se escanea desde su hilo del lote, pero su rastreo se ejecuta
+    en este único loop y con un único cliente aiohttp, así que todos comparten
+    conector y pool de conexiones, como la sesión de requests en el motor de
+    hilos. El límite de conexiones es el presupuesto global del lote.
+    """
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='webspectre-async', daemon=True)
+        self.thread.start()
+        self.http = None
+        if aiohttp is not None:
+            settings = scanner.settings
+            self.http = self.call(self._open(settings['concurrency'] + settings['verify_concurrency']))
+
+    async def _open(self, connections):
+        return open_client(self.scanner, connections)
+
+    def client(self):
+        return self.http
+
+    def call(self, coroutine):
+        """Ejecuta una corrutina en el loop compartido y espera su resultado"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def run(self, coroutine):
+        """
+        Como call(), pero una interrupción del rastreo (KeyboardInterrupt) se
+        relanza en el hilo que espera en vez de detener el loop compartido.
+        """
+        if not self.call(self._guard(coroutine)):
+            raise KeyboardInterrupt
+
+    @staticmethod
+    async def _guard(coroutine):
+        try:
+            await coroutine
+        except KeyboardInterrupt:
+            return False
+        return True
+
+    def close(self):
+        """Cierra el cliente compartido y detiene el loop"""
+        if self.http is not None:
+            self.call(self.http.close())
+            self.http = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
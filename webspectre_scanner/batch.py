@@ -0,0 +1,204 @@
+"""
+Escaneo de varios objetivos en un solo proceso
+"""
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from copy import copy
+from datetime import datetime
+from urllib.parse import urlparse
+
+from webspectre_scanner.scanner import WebSpectreScanner
+from webspectre_scanner.utils.validator import validate_url
+
+
+def load_targets(path):
+    """
+    Lee un fichero de objetivos: una URL por línea, ignorando líneas vacías,
+    comentarios (#) y duplicados. Las URLs no válidas se avisan y se omiten.
+    """
+    targets = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                if any(char.isspace() for char in line):
+                    raise ValueError(f"URL no válida: {line}")
+                url = validate_url(line)
+            except ValueError as e:
+                print(f"[!] {path}:{number}: {e}")
+                continue
+            if url not in targets:
+                targets.append(url)
+    return targets
+
+
+class BatchScanner:
+    """
+    Escanea los objetivos de --targets-file en un mismo proceso.
+
+    Un escáner propietario crea una única vez la sesión HTTP (y su pool de
+    conexiones), las métricas, el limitador de ritmo, la caché de estados
+    (la de --cache-file o una en memoria) y el pool de análisis; cada
+    objetivo se escanea con un WebSpectreScanner que los reutiliza. Con
+    --engine async crea además un SharedLoop: todos los objetivos se rastrean
+    en el mismo event loop con un único cliente aiohttp.
+
+    La concurrencia de --concurrency y --verify-concurrency es un presupuesto
+    global: se reparte a partes iguales entre los --parallel-targets objetivos
+    que se escanean a la vez, de modo que un sitio grande no acapara los
+    hilos. Cada objetivo genera sus reportes y al final se escribe un
+    resumen agregado.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.targets = load_targets(args.targets_file)
+        self.start_time = None
+        self.results = {}
+        self.active = {}
+
+        shared_args = copy(args)
+        if not shared_args.cache_file:
+            shared_args.cache_file = ':memory:'
+        self.shared = WebSpectreScanner(shared_args)
+        if self.shared.settings['engine'] == 'async':
+            from webspectre_scanner.async_engine import SharedLoop
+            self.shared.shared_loop = SharedLoop(self.shared)
+
+        self.parallel = max(1, min(args.parallel_targets, len(self.targets) or 1))
+        self.target_args = copy(shared_args)
+        self.target_args.concurrency = max(1, self.shared.settings['concurrency'] // self.parallel)
+        self.target_args.verify_concurrency = max(1, self.shared.settings['verify_concurrency'] // self.parallel)
+
+    def run_scan(self):
+        """Escanea todos los objetivos y guarda el resumen agregado"""
+        if not (self.args.no_banner or self.args.quiet):
+            self.shared.print_banner()
+        settings = self.shared.settings
+
+        print("\n[*] Configuración del lote:")
+        print(f"  - Objetivos: {len(self.targets)} ({self.args.targets_file})")
+        print(f"  - Simultáneos: {self.parallel}")
+        print(f"  - Profundidad: {self.args.depth}")
+        print(f"  - Motor: {settings['engine']} ({settings['concurrency']} concurrentes en total, "
+              f"{self.target_args.concurrency} por objetivo)")
+        print(f"  - Verificaciones: {settings['verify_concurrency']} en total, "
+              f"{self.target_args.verify_concurrency} por objetivo")
+        print(f"  - Ritmo: {self.shared.rate_limiter.describe()}")
+        print(f"  - Conexiones: {self.shared.describe_pool()}")
+        print(f"  - Caché de estados: {'en memoria' if not self.args.cache_file else self.args.cache_file}")
+
+        self.start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            futures = {executor.submit(self.scan_one, url): url for url in self.targets}
+            try:
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.results[futures[future]] = future.result()
+            except KeyboardInterrupt:
+                print("\n[!] Lote interrumpido. Cerrando los escaneos en curso...")
+                for future in futures:
+                    future.cancel()
+                for scanner in list(self.active.values()):
+                    scanner.cancel.set()
+                for future in futures:
+                    if not future.cancelled():
+                        self.results[futures[future]] = future.result()
+
+        self.save_summary()
+
+    def scan_one(self, url):
+        """Escanea un objetivo y devuelve su entrada del resumen agregado"""
+        scanner = WebSpectreScanner(self.target_args, shared=self.shared)
+        self.active[url] = scanner
+        result = {'url': url, 'target': urlparse(url).netloc}
+        try:
+            report = scanner.scan_target(url, self.args.depth)
+            result.update(status='ok', report=report.filename, pdf=report.pdf_filename)
+        except KeyboardInterrupt:
+            report, partial_name = scanner.handle_interrupt()
+            result.update(status='interrupted', report=partial_name)
+        except Exception as e:
+            scanner.handle_error(e)
+            if scanner.report_writer is not None:
+                scanner.report_writer.close()
+            report = None
+            result.update(status='error', error=str(e))
+        finally:
+            del self.active[url]
+
+        result.update(
+            valid_urls=len(scanner.valid_links),
+            invalid_urls=len(scanner.invalid_links),
+            error_count=len(scanner.errors),
+            duration_sec=report.metadata['duration_sec'] if report is not None else None
+        )
+        return result
+
+    def save_summary(self):
+        """Escribe y muestra el resumen agregado de todos los objetivos"""
+        results = [self.results[url] for url in self.targets if url in self.results]
+        statuses = [r['status'] for r in results]
+        summary = {
+            "metadata": {
+                "targets_file": self.args.targets_file,
+                "scan_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "duration_sec": round(time.time() - (self.start_time or time.time()), 2),
+                "parallel_targets": self.parallel,
+                "concurrency_per_target": self.target_args.concurrency,
+                "max_depth": self.args.depth
+            },
+            "stats": {
+                "targets": len(self.targets),
+                "completed": statuses.count('ok'),
+                "interrupted": statuses.count('interrupted'),
+                "failed": statuses.count('error'),
+                "not_started": len(self.targets) - len(results),
+                "valid_urls": sum(r['valid_urls'] for r in results),
+                "invalid_urls": sum(r['invalid_urls'] for r in results),
+                "error_count": sum(r['error_count'] for r in results)
+            },
+            "targets": results,
+            "metrics": self.shared.metrics.snapshot()
+        }
+
+        filename = f"batch_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        if self.args.output:
+            os.makedirs(self.args.output, exist_ok=True)
+            filename = os.path.join(self.args.output, filename)
+        with open(filename, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        stats = summary['stats']
+        print("\n[+] === Resumen del Lote ===")
+        print(f"  - Objetivos completados: {stats['completed']}/{stats['targets']}")
+        if stats['interrupted'] or stats['failed'] or stats['not_started']:
+            print(f"  - Interrumpidos: {stats['interrupted']}, con error: {stats['failed']}, "
+                  f"sin empezar: {stats['not_started']}")
+        print(f"  - URLs válidas encontradas: {stats['valid_urls']}")
+        print(f"  - URLs inválidas detectadas: {stats['invalid_urls']}")
+        print(f"  - Errores: {stats['error_count']}")
+        print(f"  - Duración: {summary['metadata']['duration_sec']} segundos")
+        print(f"  - Resumen agregado: {filename}")
+        if self.args.metrics_file:
+            self.shared.metrics.write_prometheus(self.args.metrics_file)
+            print(f"  - Métricas Prometheus: {self.args.metrics_file}")
+        return filename
+
+    def handle_interrupt(self):
+        """Interrupción fuera de la fase de escaneo: guarda lo que haya"""
+        print("\n[!] Lote interrumpido.")
+        self.save_summary()
+
+    def handle_error(self, error):
+        print(f"\n[!] Error crítico: {str(error)}")
+
+    def cleanup(self):
+        self.shared.cleanup()
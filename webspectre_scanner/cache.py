@@ -0,0 +1,143 @@
+"""
+Caché persistente del estado de URLs compartida entre escaneos
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    """Estado guardado de una URL"""
+    status: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    links: Optional[List[str]]
+    html: Optional[bool]
+    fetched_at: float
+
+
+class PersistentStatusCache:
+    """
+    Caché en SQLite indexada por URL normalizada.
+
+    Guarda código de estado, ETag, Last-Modified, los enlaces extraídos (solo
+    para páginas descargadas), si la página era HTML analizable y la fecha de
+    la última comprobación. Las entradas
+    más antiguas que `ttl` se descartan y, si se supera `max_entries`, se
+    eliminan las menos recientes. Las escrituras se agrupan en lotes.
+    """
+
+    FLUSH_EVERY = 500
+
+    def __init__(self, path: str, ttl: float = 86400, max_entries: int = 1000000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS url_status ("
+            " url TEXT PRIMARY KEY,"
+            " status INTEGER NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " links TEXT,"
+            " html INTEGER,"
+            " fetched_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(url_status)")}
+        if 'html' not in columns:
+            # Cachés creadas por versiones anteriores
+            self.conn.execute("ALTER TABLE url_status ADD COLUMN html INTEGER")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_url_status_fetched ON url_status (fetched_at)"
+        )
+        self.evict()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Devuelve la entrada vigente de una URL o None"""
+        with self.lock:
+            row = self.pending.get(url)
+            if row is None:
+                row = self.conn.execute(
+                    "SELECT status, etag, last_modified, links, html, fetched_at"
+                    " FROM url_status WHERE url = ?", (url,)
+                ).fetchone()
+        if row is None or time.time() - row[5] >= self.ttl:
+            return None
+
+        status, etag, last_modified, links, html, fetched_at = row
+        return CacheEntry(
+            status, etag, last_modified,
+            json.loads(links) if links is not None else None,
+            None if html is None else bool(html),
+            fetched_at
+        )
+
+    def put(self, url: str, status: int, etag: Optional[str] = None,
+            last_modified: Optional[str] = None, links: Optional[List[str]] = None,
+            html: Optional[bool] = None):
+        """
+        Registra el resultado de una petición. Los enlaces y la marca `html`
+        (la página se descargó y era HTML analizable) previos se conservan si
+        no se pasan.
+        """
+        encoded = json.dumps(links) if links is not None else None
+        with self.lock:
+            previous = self.pending.get(url)
+            if previous is not None:
+                if encoded is None:
+                    encoded = previous[3]
+                if html is None:
+                    html = previous[4]
+            self.pending[url] = (status, etag, last_modified, encoded, html, time.time())
+            if len(self.pending) >= self.FLUSH_EVERY:
+                self._flush()
+
+    def flush(self):
+        """Escribe en disco las entradas pendientes"""
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO url_status (url, status, etag, last_modified, links, html, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET"
+                "  status = excluded.status,"
+                "  etag = excluded.etag,"
+                "  last_modified = excluded.last_modified,"
+                "  links = COALESCE(excluded.links, url_status.links),"
+                "  html = COALESCE(excluded.html, url_status.html),"
+                "  fetched_at = excluded.fetched_at",
+                [(url,) + row for url, row in self.pending.items()]
+            )
+        self.pending.clear()
+
+    def evict(self):
+        """Elimina entradas caducadas y recorta la tabla a max_entries"""
+        with self.lock:
+            self._flush()
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM url_status WHERE fetched_at < ?", (time.time() - self.ttl,)
+                )
+                self.conn.execute(
+                    "DELETE FROM url_status WHERE url IN ("
+                    " SELECT url FROM url_status ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def close(self):
+        """Vuelca lo pendiente, aplica la política de expulsión y cierra la base de datos"""
+        self.evict()
+        self.conn.close()
@@ -0,0 +1,155 @@
+"""
+Forma canónica de las URLs para no rastrear dos veces el mismo recurso
+"""
+
+import re
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# Documentos que el servidor sirve al pedir el directorio que los contiene
+INDEX_FILES = (
+    'index.html', 'index.htm', 'index.php', 'index.asp', 'index.aspx',
+    'index.jsp', 'default.htm', 'default.html', 'default.asp', 'default.aspx'
+)
+
+UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+PERCENT_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+
+
+def _normalize_escape(match):
+    """Decodifica los caracteres no reservados y pone en mayúsculas el resto (RFC 3986, 6.2.2)"""
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED else '%' + match.group(1).upper()
+
+
+def remove_dot_segments(path: str) -> str:
+    """Elimina los segmentos '.' y '..' de una ruta absoluta (RFC 3986, 5.2.4)"""
+    segments = path.split('/')
+    resolved = []
+    for segment in segments[1:]:
+        if segment == '..':
+            if resolved:
+                resolved.pop()
+        elif segment != '.':
+            resolved.append(segment)
+    if segments[-1] in ('.', '..'):
+        resolved.append('')
+    return '/' + '/'.join(resolved)
+
+
+class Canonicalizer:
+    """
+    Convierte URLs http(s) a una forma canónica.
+
+    Siempre aplica las normalizaciones que no cambian el recurso (RFC 3986):
+    esquema y host en minúsculas, sin puerto por defecto, escapes %XX
+    normalizados, sin segmentos '.' y '..', y '/' como ruta vacía. Las
+    políticas que pueden unir URLs distintas en servidores concretos son
+    opcionales.
+
+    Args:
+        trailing_slash: 'keep' (no tocar), 'strip' (quitar la barra final) o
+            'add' (añadirla a las rutas cuyo último segmento no tiene extensión)
+        strip_index: Quitar index.html, index.php... del final de la ruta
+        ignore_case: Tratar la ruta como insensible a mayúsculas
+        merge_schemes: Usar para http y https del mismo host el esquema de la
+            página donde se encontró el enlace
+        keep_params: Parámetros de query que se conservan (ordenados); el
+            resto se descarta, como sin canonicalización
+    """
+
+    def __init__(self, trailing_slash='keep', strip_index=False, ignore_case=False,
+                 merge_schemes=False, keep_params=()):
+        self.trailing_slash = trailing_slash
+        self.strip_index = strip_index
+        self.ignore_case = ignore_case
+        self.merge_schemes = merge_schemes
+        self.keep_params = frozenset(keep_params)
+
+    def describe(self):
+        """Resumen legible de las políticas activas"""
+        parts = []
+        if self.trailing_slash != 'keep':
+            parts.append(f"barra final: {self.trailing_slash}")
+        if self.strip_index:
+            parts.append('sin index.*')
+        if self.ignore_case:
+            parts.append('ruta sin mayúsculas')
+        if self.merge_schemes:
+            parts.append('http = https')
+        if self.keep_params:
+            parts.append(f"query: {', '.join(sorted(self.keep_params))}")
+        return ', '.join(parts) or 'solo RFC 3986'
+
+    def canonical(self, url: str, scheme: str = None) -> str:
+        """
+        Forma canónica de una URL absoluta, sin fragmento.
+
+        Args:
+            url: URL a canonicalizar
+            scheme: Esquema de la página de origen, para merge_schemes
+        """
+        parts = urlsplit(url)
+        return self.canonical_parts(parts.scheme, parts.netloc, parts.path, parts.query, scheme)
+
+    def canonical_parts(self, url_scheme, netloc, path, query, scheme=None) -> str:
+        """Como canonical() pero a partir de las partes ya separadas de la URL"""
+        url_scheme = url_scheme.lower()
+        netloc = self.netloc(url_scheme, netloc)
+        if self.merge_schemes and scheme and url_scheme in DEFAULT_PORTS:
+            url_scheme = scheme
+        return urlunsplit((url_scheme, netloc, self.path(path), self.query(query), ''))
+
+    @staticmethod
+    def netloc(scheme: str, netloc: str) -> str:
+        """Host en minúsculas y sin el puerto por defecto del esquema"""
+        userinfo, at, hostport = netloc.rpartition('@')
+        host, port = hostport, ''
+        if not hostport.endswith(']'):
+            head, colon, tail = hostport.rpartition(':')
+            if colon:
+                host, port = head, tail
+        host = host.lower()
+        if port and port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        return f"{userinfo}{at}{host}"
+
+    def path(self, path: str) -> str:
+        """Ruta canónica según las políticas configuradas"""
+        if self.ignore_case:
+            path = path.lower()
+        if '%' in path:
+            path = PERCENT_ESCAPE.sub(_normalize_escape, path)
+        if '/.' in path:
+            path = remove_dot_segments(path)
+        if not path:
+            return '/'
+
+        strip = self.trailing_slash == 'strip'
+        if strip:
+            path = path.rstrip('/') or '/'
+        last = path.rsplit('/', 1)[-1]
+        # Al quitar la barra puede quedar otro index al final (/index.php/index.html)
+        while self.strip_index and last.lower() in INDEX_FILES:
+            path = path[:-len(last)]
+            if strip:
+                path = path.rstrip('/') or '/'
+            last = path.rsplit('/', 1)[-1]
+        if self.trailing_slash == 'add' and last and '.' not in last:
+            path += '/'
+        return path
+
+    def query(self, query: str) -> str:
+        """Solo los parámetros de keep_params, ordenados"""
+        if not query or not self.keep_params:
+            return ''
+        # Se conservan los pares tal como vienen codificados (solo se normalizan
+        # los escapes, como en la ruta): volver a codificarlos cambiaría '/' por
+        # '%2F' o '%20' por '+' y la URL dejaría de ser la misma
+        if '%' in query:
+            query = PERCENT_ESCAPE.sub(_normalize_escape, query)
+        pairs = [(unquote_plus(pair.partition('=')[0]), pair)
+                 for pair in query.split('&') if pair]
+        return '&'.join(pair for name, pair in sorted(pairs) if name in self.keep_params)
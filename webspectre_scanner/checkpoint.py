@@ -0,0 +1,55 @@
+"""
+Puntos de control para reanudar escaneos interrumpidos
+"""
+
+import gzip
+import json
+import os
+import time
+
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointJournal:
+    """
+    Guarda periódicamente el estado del rastreo en un fichero JSON comprimido.
+
+    Cada guardado se escribe primero en un fichero temporal y luego se
+    sustituye de forma atómica, así que una caída a mitad de escritura nunca
+    deja un punto de control corrupto.
+    """
+
+    def __init__(self, path: str, interval: float = 60):
+        self.path = path
+        self.interval = interval
+        self.last_save = time.monotonic()
+
+    def due(self) -> bool:
+        """Indica si ya toca guardar un nuevo punto de control"""
+        return time.monotonic() - self.last_save >= self.interval
+
+    def save(self, state: dict):
+        """Escribe el estado completo de forma atómica"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(dict(state, version=CHECKPOINT_VERSION), f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.last_save = time.monotonic()
+
+
+def load_checkpoint(path: str) -> dict:
+    """
+    Carga un punto de control guardado por CheckpointJournal.
+
+    Raises:
+        ValueError: Si el fichero no es un punto de control compatible
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        state = json.load(f)
+
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Punto de control incompatible: {path}")
+    return state
@@ -3,18 +3,27 @@ Módulo para manejar la interfaz de línea de comandos
 """
 
 import argparse
+import os
+import re
+
+from webspectre_scanner.utils.validator import parse_address
 
 def parse_arguments():
     """Configura y parsea los argumentos de línea de comandos"""
     parser = argparse.ArgumentParser(
         prog='python -m webspectre_scanner',
-        usage='python -m webspectre_scanner [url] [-h] [-d DEPTH] [-o OUTPUT] [--fast-scan] [--max-pages MAX_PAGES] [--no-verify]',
+        usage='python -m webspectre_scanner [url] [-h] [-d DEPTH] [-o OUTPUT] [--fast-scan] [--max-pages MAX_PAGES] [--no-verify]\n       [--max-body-size BYTES] [--no-banner] [-q]\n       [--section-budget N] [--section-patience N] [--trust-after N]\n       [--engine {threads,async}] [--concurrency N] [--verify-concurrency N]\n       [--rate RATE] [--burst BURST] [--adaptive-rate] [--no-politeness]\n       [--frontier-max N] [--frontier-spill-dir DIR]\n       [--parser {stream,lxml,bs4}] [--parse-workers N]\n       [--include REGEX] [--exclude REGEX]\n       [--trailing-slash {keep,strip,add}] [--strip-index] [--ignore-case] [--merge-schemes]\n       [--keep-params NAMES] [--near-duplicates] [--simhash-distance N]\n       [--sitemaps] [--sitemap-max-urls N]\n       [--cache-file PATH] [--cache-ttl SECONDS] [--cache-max-entries N]\n       [--checkpoint PATH] [--checkpoint-interval SECONDS] [--resume PATH]\n       [--bloom-fp RATE] [--bloom-capacity N]\n       [--report-format {json,compact,ndjson}]\n       [--pdf {summary,full}] [--pdf-background] [--no-pdf]\n       [--stats-interval SECONDS] [--metrics-file PATH]\n       [--pool-size N] [--pool-hosts N] [--max-connections N] [--no-keep-alive]\n       [--retries N] [--retry-backoff SECONDS] [--http2]\n       [--targets-file PATH] [--parallel-targets N]\n       [--workers N] [--listen HOST:PORT] [--join HOST:PORT] [--auth-key KEY]\n       [--partitions N] [--partition-by {host,section}] [--lease-size N] [--lease-timeout SECONDS]',
         description="WebSpectre Scanner - Escáner web avanzado con verificación de URLs",
         formatter_class=argparse.RawTextHelpFormatter,
         epilog="""Ejemplos de uso:
   Escaneo básico: python -m webspectre_scanner https://example.com
   Escaneo profundo: python -m webspectre_scanner https://example.com -d 3 -o reportes
-  Escaneo rápido: python -m webspectre_scanner https://example.com --fast-scan"""
+  Escaneo rápido: python -m webspectre_scanner https://example.com --fast-scan
+  Motor asíncrono: python -m webspectre_scanner https://example.com --engine async --concurrency 200
+  Reanudar escaneo: python -m webspectre_scanner --resume scan.ckpt
+  Varios objetivos: python -m webspectre_scanner --targets-file dominios.txt --parallel-targets 8 -o reportes
+  Distribuido: python -m webspectre_scanner https://example.com --workers 4 --partition-by section
+  Trabajador remoto: python -m webspectre_scanner --join 10.0.0.5:7070 --auth-key SECRETO"""
     )
 
     parser.add_argument(
@@ -43,10 +52,422 @@ def parse_arguments():
         default=20,
         help='Límite de páginas por sección (predeterminado: 20)'
     )
+    parser.add_argument(
+        '--section-budget',
+        type=int,
+        default=0,
+        metavar='N',
+        help='URLs descargadas como máximo por plantilla de URL (ej. /blog/{n}/);\n'
+             'los listados paginados y archivos por fecha usan --max-pages (predeterminado: 0, sin límite)'
+    )
+    parser.add_argument(
+        '--section-patience',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Dejar de rastrear una plantilla tras N páginas seguidas sin enlaces nuevos\n'
+             '(predeterminado: 0, nunca; 5 con --fast-scan)'
+    )
+    parser.add_argument(
+        '--trust-after',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Dar por válidos sin verificar los enlaces de una sección con N verificaciones\n'
+             'válidas y ninguna inválida (predeterminado: 0, verificar siempre)'
+    )
     parser.add_argument(
         '--no-verify',
         action='store_true',
         help='Deshabilitar verificación SSL'
     )
+    parser.add_argument(
+        '--max-body-size',
+        type=int,
+        default=10 * 1024 * 1024,
+        metavar='BYTES',
+        help='Tamaño máximo del cuerpo de una página: si Content-Length lo supera no se\n'
+             'descarga y, si no lo declara, se analiza solo hasta ese tamaño\n'
+             '(predeterminado: 10485760; 0 sin límite)'
+    )
+    parser.add_argument(
+        '--no-banner',
+        action='store_true',
+        help='No mostrar el banner al iniciar'
+    )
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Sin banner, configuración ni una línea por página escaneada;\n'
+             'se muestran los avisos, los errores y el resumen final'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['threads', 'async'],
+        default='threads',
+        help='Motor de rastreo: hilos o asyncio (predeterminado: threads)'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        metavar='N',
+        help='Peticiones simultáneas (predeterminado: 3 con threads, 100 con async)'
+    )
+    parser.add_argument(
+        '--verify-concurrency',
+        type=int,
+        default=10,
+        metavar='N',
+        help='Verificaciones de enlaces simultáneas (predeterminado: 10)'
+    )
+    parser.add_argument(
+        '--verify-per-host',
+        type=int,
+        default=4,
+        metavar='N',
+        help='Verificaciones simultáneas por host (predeterminado: 4)'
+    )
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        metavar='N',
+        help='Conexiones reutilizables por host (predeterminado: concurrencia + verificaciones, mínimo 10)'
+    )
+    parser.add_argument(
+        '--pool-hosts',
+        type=int,
+        default=10,
+        metavar='N',
+        help='Hosts distintos con pool de conexiones en memoria (predeterminado: 10)'
+    )
+    parser.add_argument(
+        '--max-connections',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Máximo de conexiones en uso a la vez entre todos los hosts, 0 sin límite (predeterminado: 0)'
+    )
+    parser.add_argument(
+        '--no-keep-alive',
+        action='store_true',
+        help='Cerrar la conexión tras cada petición en vez de reutilizarla'
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Reintentos de GET/HEAD ante errores de conexión o estados 429/5xx (predeterminado: 0)'
+    )
+    parser.add_argument(
+        '--retry-backoff',
+        type=float,
+        default=0.5,
+        metavar='SECONDS',
+        help='Factor de espera exponencial entre reintentos (predeterminado: 0.5)'
+    )
+    parser.add_argument(
+        '--http2',
+        action='store_true',
+        help="Usar HTTP/2 con httpx si está instalado (pip install 'httpx[http2]'); solo motor threads"
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=5.0,
+        help='Peticiones por segundo permitidas por host (predeterminado: 5)'
+    )
+    parser.add_argument(
+        '--burst',
+        type=int,
+        default=10,
+        help='Ráfaga máxima de peticiones por host (predeterminado: 10)'
+    )
+    parser.add_argument(
+        '--adaptive-rate',
+        action='store_true',
+        help='Reducir el ritmo ante respuestas 429/503 y respetar Retry-After'
+    )
+    parser.add_argument(
+        '--no-politeness',
+        action='store_true',
+        help='Desactivar el límite de ritmo (solo para hosts propios)'
+    )
+    parser.add_argument(
+        '--frontier-max',
+        type=int,
+        default=100000,
+        metavar='N',
+        help='URLs pendientes en memoria antes de volcar a disco (predeterminado: 100000)'
+    )
+    parser.add_argument(
+        '--frontier-spill-dir',
+        metavar='DIR',
+        help='Directorio para el volcado de la frontera (predeterminado: temporal del sistema)'
+    )
+    parser.add_argument(
+        '--parser',
+        choices=['stream', 'lxml', 'bs4'],
+        default='stream',
+        help='Extractor de enlaces: stream (una pasada), lxml o bs4 (predeterminado: stream)'
+    )
+    parser.add_argument(
+        '--parse-workers',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Procesos dedicados al análisis de HTML (predeterminado: 0, en el propio proceso)'
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        default=[],
+        metavar='REGEX',
+        help='Solo seguir los enlaces cuya URL absoluta cumpla la expresión (repetible)'
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='REGEX',
+        help='Descartar los enlaces cuya URL absoluta cumpla la expresión (repetible)'
+    )
+    parser.add_argument(
+        '--trailing-slash',
+        choices=['keep', 'strip', 'add'],
+        default='keep',
+        help='Barra final de las rutas al canonicalizar URLs: keep (no tocar), strip (quitar)\n'
+             'o add (añadir si el último segmento no tiene extensión) (predeterminado: keep)'
+    )
+    parser.add_argument(
+        '--strip-index',
+        action='store_true',
+        help='Tratar /dir/index.html, index.php... como /dir/'
+    )
+    parser.add_argument(
+        '--ignore-case',
+        action='store_true',
+        help='Tratar las rutas como insensibles a mayúsculas (solo para servidores que lo son)'
+    )
+    parser.add_argument(
+        '--merge-schemes',
+        action='store_true',
+        help='Tratar http:// y https:// del mismo host como la misma URL'
+    )
+    parser.add_argument(
+        '--keep-params',
+        type=lambda value: [name for name in value.split(',') if name],
+        default=[],
+        metavar='NAMES',
+        help='Parámetros de query que se conservan, separados por comas (predeterminado: ninguno)'
+    )
+    parser.add_argument(
+        '--near-duplicates',
+        action='store_true',
+        help='No seguir los enlaces de páginas casi idénticas a otra ya rastreada (SimHash)'
+    )
+    parser.add_argument(
+        '--simhash-distance',
+        type=int,
+        default=3,
+        metavar='N',
+        help='Bits distintos (de 64) hasta los que dos páginas se consideran casi idénticas (predeterminado: 3)'
+    )
+    parser.add_argument(
+        '--sitemaps',
+        action='store_true',
+        help='Sembrar el rastreo con las URLs de los sitemaps declarados en robots.txt\n'
+             '(o /sitemap.xml), incluidos índices y sitemaps .gz'
+    )
+    parser.add_argument(
+        '--sitemap-max-urls',
+        type=int,
+        default=50000,
+        metavar='N',
+        help='URLs tomadas de los sitemaps como máximo (predeterminado: 50000)'
+    )
+    parser.add_argument(
+        '--cache-file',
+        metavar='PATH',
+        help='Base de datos SQLite para reutilizar estados de URL entre escaneos'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=86400,
+        metavar='SECONDS',
+        help='Vigencia de las entradas de la caché persistente (predeterminado: 86400)'
+    )
+    parser.add_argument(
+        '--cache-max-entries',
+        type=int,
+        default=1000000,
+        metavar='N',
+        help='Máximo de URLs en la caché persistente (predeterminado: 1000000)'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        metavar='PATH',
+        help='Fichero donde guardar periódicamente el estado del escaneo'
+    )
+    parser.add_argument(
+        '--checkpoint-interval',
+        type=float,
+        default=60,
+        metavar='SECONDS',
+        help='Segundos entre puntos de control (predeterminado: 60)'
+    )
+    parser.add_argument(
+        '--resume',
+        metavar='PATH',
+        help='Reanudar un escaneo interrumpido desde su punto de control'
+    )
+    parser.add_argument(
+        '--bloom-fp',
+        type=float,
+        metavar='RATE',
+        help='Guardar las URLs visitadas en un filtro de Bloom con esta tasa de falsos positivos (ej. 0.001)'
+    )
+    parser.add_argument(
+        '--bloom-capacity',
+        type=int,
+        default=1000000,
+        metavar='N',
+        help='URLs previstas para dimensionar el filtro de Bloom (predeterminado: 1000000)'
+    )
+    parser.add_argument(
+        '--report-format',
+        choices=['json', 'compact', 'ndjson'],
+        default='json',
+        help='Formato del reporte: json indentado, compact (sin indentar) o ndjson\n'
+             '(JSON Lines escrito durante el escaneo) (predeterminado: json)'
+    )
+    parser.add_argument(
+        '--pdf',
+        choices=['summary', 'full'],
+        default='summary',
+        help='Contenido del PDF: summary (primeras 30 URLs y 15 errores) o full\n'
+             '(todas las URLs y errores, paginado) (predeterminado: summary)'
+    )
+    parser.add_argument(
+        '--pdf-background',
+        action='store_true',
+        help='Generar el PDF completo en un proceso aparte sin esperar a que termine (requiere --pdf full)'
+    )
+    parser.add_argument(
+        '--no-pdf',
+        action='store_true',
+        help='No generar reporte PDF (solo JSON)'
+    )
+    parser.add_argument(
+        '--stats-interval',
+        type=float,
+        default=10,
+        metavar='SECONDS',
+        help='Cada cuántos segundos mostrar la línea de estadísticas en vivo, 0 para desactivar (predeterminado: 10)'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        metavar='PATH',
+        help='Guardar las métricas del escaneo en formato de texto de Prometheus'
+    )
+
+    parser.add_argument(
+        '--targets-file',
+        metavar='PATH',
+        help='Escanear en un solo proceso todas las URLs del fichero (una por línea)'
+    )
+    parser.add_argument(
+        '--parallel-targets',
+        type=int,
+        default=4,
+        metavar='N',
+        help='Objetivos escaneados a la vez con --targets-file; la concurrencia se reparte\n'
+             'entre ellos (predeterminado: 4)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Rastreo distribuido: procesos trabajadores locales que descargan y analizan\n'
+             'mientras este proceso coordina la frontera (predeterminado: 0, sin distribuir)'
+    )
+    parser.add_argument(
+        '--listen',
+        metavar='HOST:PORT',
+        help='Coordinar un rastreo distribuido aceptando trabajadores de otros nodos en esta dirección'
+    )
+    parser.add_argument(
+        '--join',
+        metavar='HOST:PORT',
+        help='Trabajar para el coordinador de esta dirección en lugar de escanear'
+    )
+    parser.add_argument(
+        '--auth-key',
+        metavar='KEY',
+        help='Clave compartida entre coordinador y trabajadores (o variable WEBSPECTRE_AUTH_KEY)'
+    )
+    parser.add_argument(
+        '--partitions',
+        type=int,
+        default=16,
+        metavar='N',
+        help='Particiones de la frontera repartidas entre los trabajadores (predeterminado: 16)'
+    )
+    parser.add_argument(
+        '--partition-by',
+        choices=['host', 'section'],
+        default='host',
+        help='Clave de partición: host (el ritmo por host lo aplica un solo trabajador) o section\n'
+             '(host y primer segmento de la ruta, reparte un único sitio) (predeterminado: host)'
+    )
+    parser.add_argument(
+        '--lease-size',
+        type=int,
+        default=0,
+        metavar='N',
+        help='URLs que pide cada trabajador por lote (predeterminado: el doble de sus hilos)'
+    )
+    parser.add_argument(
+        '--lease-timeout',
+        type=float,
+        default=60,
+        metavar='SECONDS',
+        help='Segundos sin noticias de un trabajador antes de devolver sus URLs a la cola (predeterminado: 60)'
+    )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.targets_file and (args.url or args.resume or args.checkpoint):
+        parser.error('--targets-file no se puede combinar con una URL, --checkpoint ni --resume')
+    if args.targets_file and (args.workers or args.listen or args.join):
+        parser.error('--targets-file no se puede combinar con el modo distribuido')
+    if args.join and (args.url or args.resume or args.workers or args.listen):
+        parser.error('--join no se puede combinar con una URL, --resume, --workers ni --listen')
+    for option in ('listen', 'join'):
+        value = getattr(args, option)
+        if value is None:
+            continue
+        try:
+            parse_address(value)
+        except ValueError as e:
+            parser.error(f'--{option}: {e}')
+        if not (args.auth_key or os.environ.get('WEBSPECTRE_AUTH_KEY')):
+            parser.error(f'--{option} requiere --auth-key o la variable WEBSPECTRE_AUTH_KEY')
+    for option in ('include', 'exclude'):
+        for pattern in getattr(args, option):
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                parser.error(f'--{option} {pattern!r}: expresión regular inválida ({e})')
+    if args.pdf_background and (args.pdf != 'full' or args.no_pdf):
+        parser.error('--pdf-background requiere --pdf full y no se puede combinar con --no-pdf')
+    if args.partitions < 1:
+        parser.error('--partitions debe ser al menos 1')
+    if args.sitemap_max_urls < 1:
+        parser.error('--sitemap-max-urls debe ser al menos 1')
+    for option in ('section_budget', 'section_patience', 'trust_after', 'max_body_size'):
+        if getattr(args, option) < 0:
+            parser.error(f"--{option.replace('_', '-')} no puede ser negativo")
+    return args
@@ -0,0 +1,479 @@
+"""
+Rastreo distribuido: un coordinador con la frontera y trabajadores que
+descargan y analizan páginas en otros procesos o nodos
+"""
+
+import hashlib
+import multiprocessing
+import os
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from copy import copy
+from multiprocessing.managers import BaseManager
+from urllib.parse import urlparse
+
+from webspectre_scanner.frontier import LevelGate, section_of
+from webspectre_scanner.scanner import WebSpectreScanner
+from webspectre_scanner.simhash import simhash
+from webspectre_scanner.utils.validator import parse_address
+
+# Variable de entorno alternativa a --auth-key
+AUTH_KEY_ENV = 'WEBSPECTRE_AUTH_KEY'
+
+
+def auth_key(args) -> bytes:
+    """Clave compartida del coordinador y sus trabajadores, o None si no se indicó"""
+    key = args.auth_key or os.environ.get(AUTH_KEY_ENV)
+    return key.encode('utf-8') if key else None
+
+
+def partition_of(url: str, partitions: int, by: str = 'host') -> int:
+    """
+    Partición a la que pertenece una URL.
+
+    Se usa un hash estable (no hash(), que cambia entre procesos) para que
+    todos los nodos calculen lo mismo. Con by='host' todas las URLs de un host
+    van a la misma partición y por tanto al mismo trabajador, que aplica su
+    límite de ritmo; con by='section' se reparten también por sección.
+    """
+    key = urlparse(url).netloc.lower()
+    if by == 'section':
+        key = f"{key}/{section_of(url)}"
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % partitions
+
+
+class _CoordinatorManager(BaseManager):
+    """Servidor del coordinador: expone un CrawlCoordinator a los trabajadores"""
+
+
+class _WorkerManager(BaseManager):
+    """Cliente de los trabajadores"""
+
+
+_WorkerManager.register('coordinator')
+
+
+class CrawlCoordinator:
+    """
+    Estado compartido del rastreo distribuido, servido a los trabajadores.
+
+    Mantiene una frontera de páginas y una cola de verificaciones por
+    partición. Cada partición pertenece a un único trabajador (se reparten
+    en turnos cuando un trabajador se registra o deja de responder), que
+    recibe de ella lotes de URLs con exchange() y devuelve en la siguiente
+    llamada los estados y enlaces obtenidos. El coordinador decide qué es
+    nuevo con route_link del escáner, de modo que visited, los resultados y
+    los reportes son los mismos que en un escaneo local.
+    """
+
+    def __init__(self, scanner, max_depth, partitions=16, partition_by='host', lease_timeout=60):
+        self.scanner = scanner
+        self.max_depth = max_depth
+        self.partition_by = partition_by
+        self.lease_timeout = lease_timeout
+        self.lock = threading.RLock()
+        self.pages = [scanner.new_frontier() for _ in range(max(1, partitions))]
+        self.checks = [deque() for _ in self.pages]
+        self.gate = LevelGate()
+        self.owners = [None] * len(self.pages)
+        # Trabajador -> último contacto y trabajos entregados aún sin resultado
+        self.workers = {}
+        self.stopping = False
+
+    def register(self, name):
+        """Da de alta un trabajador y devuelve la configuración que debe aplicar"""
+        with self.lock:
+            worker_id = name
+            while worker_id in self.workers:
+                worker_id = f"{name}-{secrets.token_hex(2)}"
+            self.workers[worker_id] = {'seen': time.monotonic(), 'leased': {}}
+            self.rebalance()
+            print(f"\n[+] Trabajador conectado: {worker_id} ({len(self.workers)} en total)", flush=True)
+            settings = self.scanner.settings
+            return {
+                'worker_id': worker_id,
+                'url_filter': self.scanner.url_filter,
+                'trust_after': self.scanner.sections.trust_after,
+                'verify_ssl': settings['verify_ssl'],
+                'near_duplicates': self.scanner.near_duplicates is not None
+            }
+
+    def exchange(self, worker_id, results, want, metrics=None):
+        """
+        Recibe los resultados de un trabajador y le entrega hasta `want` trabajos
+        nuevos de sus particiones, como (tipo, url, profundidad). `metrics` son
+        los contadores e histogramas medidos por el trabajador desde la llamada
+        anterior, que se suman a las métricas del escaneo.
+
+        Returns:
+            La lista de trabajos (puede estar vacía) o None cuando el rastreo
+            ha terminado y el trabajador debe salir
+        """
+        with self.lock:
+            worker = self.workers.get(worker_id)
+            if worker is None:
+                if self.stopping:
+                    return None
+                # Se le dio por caído y sus trabajos ya volvieron a la cola: sus
+                # resultados se descartan, pero vuelve a recibir particiones
+                worker = self.workers[worker_id] = {'seen': time.monotonic(), 'leased': {}}
+                self.rebalance()
+                print(f"\n[+] Trabajador reconectado: {worker_id} ({len(self.workers)} en total)", flush=True)
+                results = []
+            worker['seen'] = time.monotonic()
+            if metrics is not None:
+                self.scanner.metrics.merge(*metrics)
+
+            for result in results:
+                if worker['leased'].pop((result[0], result[1]), None) is not None:
+                    self.apply(result)
+
+            if self.stopping:
+                return None
+
+            items = []
+            for partition, owner in enumerate(self.owners):
+                if owner != worker_id:
+                    continue
+                pages, checks = self.pages[partition], self.checks[partition]
+                while pages and len(items) < want:
+                    url, depth = pages.pop()
+                    items.append(('page', url, depth))
+                while checks and len(items) < want:
+                    url, depth = checks.popleft()
+                    items.append(('check', url, depth))
+            for item in items:
+                worker['leased'][(item[0], item[1])] = item
+            return items
+
+    def apply(self, result):
+        """Incorpora el resultado de una página o una verificación"""
+        scanner = self.scanner
+        kind, url, depth, is_valid, status, links, error, fingerprint = result
+        if kind == 'check':
+            scanner.url_status_cache[url] = (is_valid, status)
+            scanner.classify(url, is_valid, status)
+            return
+
+        # Los enlaces se enrutan por niveles, como en un escaneo local
+        self.gate.done(url, depth, self.page_links(url, is_valid, status, links, error, fingerprint))
+        for url, depth, links in self.gate.ready():
+            pages, checks = scanner.route_links(url, scanner.filter_unvisited(links), depth + 1, self.max_depth)
+            for link, link_depth in pages:
+                self.push('page', link, link_depth)
+            for link, link_depth in checks:
+                self.push('check', link, link_depth)
+
+    def page_links(self, url, is_valid, status, links, error, fingerprint):
+        """Clasifica una página descargada por un trabajador y devuelve los enlaces que hay que seguir"""
+        scanner = self.scanner
+        if not status:
+            scanner.fetch_failed(url, error)
+            return []
+        scanner.url_status_cache[url] = (is_valid, status)
+        scanner.classify(url, is_valid, status)
+        if not is_valid:
+            return []
+        if not scanner.args.quiet:
+            print(f"\n[+] Escaneando: {url}", flush=True)
+        if error is not None:
+            scanner.report_page_error(url, error)
+            return []
+        if scanner.is_near_duplicate(url, fingerprint):
+            return []
+        return links
+
+    def push(self, kind, url, depth):
+        """Encola una URL en su partición; las verificaciones ya conocidas se resuelven aquí"""
+        partition = partition_of(url, len(self.pages), self.partition_by)
+        if kind == 'page':
+            self.pages[partition].push(url, depth)
+            self.gate.add(depth)
+            return
+
+        scanner = self.scanner
+        cached = scanner.url_status_cache.get(url) or scanner.cached_status(url)
+        if cached is not None:
+            scanner.classify(url, *cached)
+            return
+        self.checks[partition].append((url, depth))
+
+    def rebalance(self):
+        """Reparte las particiones en turnos entre los trabajadores conectados"""
+        workers = list(self.workers)
+        for partition in range(len(self.owners)):
+            self.owners[partition] = workers[partition % len(workers)] if workers else None
+
+    def expire(self):
+        """Da de baja a los trabajadores que no responden y devuelve sus trabajos a la cola"""
+        with self.lock:
+            deadline = time.monotonic() - self.lease_timeout
+            lost = [worker_id for worker_id, worker in self.workers.items() if worker['seen'] < deadline]
+            for worker_id in lost:
+                for kind, url, depth in self.workers.pop(worker_id)['leased'].values():
+                    partition = partition_of(url, len(self.pages), self.partition_by)
+                    if kind == 'page':
+                        self.pages[partition].push(url, depth)
+                    else:
+                        self.checks[partition].append((url, depth))
+                print(f"\n[!] Trabajador sin respuesta, sus URLs vuelven a la cola: {worker_id}", flush=True)
+            if lost:
+                self.rebalance()
+
+    def leased(self, kind):
+        with self.lock:
+            return [(url, depth) for worker in self.workers.values()
+                    for item_kind, url, depth in worker['leased'].values() if item_kind == kind]
+
+    def pending_work(self):
+        """Páginas y verificaciones pendientes, incluidas las entregadas sin resultado"""
+        with self.lock:
+            pages = ([item for frontier in self.pages for item in frontier.items()]
+                     + self.leased('page') + self.gate.items())
+            checks = [item for queue in self.checks for item in queue] + self.leased('check')
+            return pages, checks
+
+    def finished(self):
+        with self.lock:
+            return not (any(self.pages) or any(self.checks)
+                        or any(worker['leased'] for worker in self.workers.values()))
+
+    def close(self):
+        for frontier in self.pages:
+            frontier.close()
+
+
+class DistributedCoordinator:
+    """
+    Ejecuta el rastreo de un WebSpectreScanner en modo distribuido.
+
+    Sirve un CrawlCoordinator por socket (multiprocessing.managers,
+    autenticado con la clave compartida) en --listen, o en un puerto libre de
+    127.0.0.1 si solo hay trabajadores locales, y lanza --workers procesos
+    trabajadores en esta máquina. Otros nodos se unen con --join.
+    """
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.args = scanner.args
+        self.processes = []
+
+    def run(self, start_url, max_depth):
+        scanner = self.scanner
+        args = self.args
+        coordinator = CrawlCoordinator(
+            scanner, max_depth,
+            partitions=args.partitions,
+            partition_by=args.partition_by,
+            lease_timeout=args.lease_timeout
+        )
+        pages, checks = scanner.initial_work(start_url, max_depth)
+        for url, depth in pages:
+            coordinator.push('page', url, depth)
+        for url, depth in checks:
+            coordinator.push('check', url, depth)
+
+        key = auth_key(args) or secrets.token_hex(16).encode('ascii')
+        address = parse_address(args.listen) if args.listen else ('127.0.0.1', 0)
+        _CoordinatorManager.register('coordinator', callable=lambda: coordinator)
+        server = _CoordinatorManager(address=address, authkey=key).get_server()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.address
+        if args.listen:
+            print(f"\n[~] Coordinador escuchando en {host}:{port}", flush=True)
+
+        scanner.pending_work = coordinator.pending_work
+        scanner.metrics.watch('frontier', lambda: sum(len(frontier) for frontier in coordinator.pages), owner=scanner)
+        scanner.metrics.watch('pages_in_flight', lambda: len(coordinator.leased('page')), owner=scanner)
+        scanner.metrics.watch('verify_pending', lambda: sum(map(len, coordinator.checks))
+                              + len(coordinator.leased('check')), owner=scanner)
+        scanner.metrics.watch('workers', lambda: len(coordinator.workers), owner=scanner)
+
+        self.start_workers(f"{'127.0.0.1' if host in ('0.0.0.0', '') else host}:{port}", key)
+        try:
+            while not coordinator.finished():
+                if scanner.cancel.is_set():
+                    raise KeyboardInterrupt
+                if self.processes and not args.listen and not any(p.is_alive() for p in self.processes):
+                    raise RuntimeError("Los trabajadores terminaron antes de completar el rastreo")
+                time.sleep(0.2)
+                coordinator.expire()
+                with coordinator.lock:
+                    scanner.maybe_checkpoint()
+                scanner.stats_ticker.tick()
+        except KeyboardInterrupt:
+            with coordinator.lock:
+                scanner.save_checkpoint()
+            raise
+        finally:
+            coordinator.stopping = True
+            self.stop_workers()
+            server.stop_event.set()
+            server.listener.close()
+            coordinator.close()
+            scanner.pending_work = None
+            scanner.metrics.unwatch('frontier', 'pages_in_flight', 'verify_pending', 'workers', owner=scanner)
+
+    def start_workers(self, address, key):
+        """Lanza los trabajadores locales, cada uno con su sesión y su concurrencia"""
+        worker_args = copy(self.args)
+        worker_args.join = address
+        worker_args.auth_key = key.decode('utf-8')
+        worker_args.listen = None
+        worker_args.workers = 0
+        worker_args.cache_file = None
+        worker_args.checkpoint = worker_args.resume = None
+        worker_args.metrics_file = None
+        worker_args.stats_interval = 0
+        context = multiprocessing.get_context('spawn')
+        for number in range(self.args.workers):
+            process = context.Process(
+                target=run_local_worker, args=(worker_args,),
+                name=f"webspectre-worker-{number + 1}", daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def stop_workers(self):
+        """Espera a que los trabajadores locales salgan y termina los que no lo hagan"""
+        deadline = time.monotonic() + 5
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+
+def run_local_worker(args):
+    """Punto de entrada de un proceso trabajador lanzado por el coordinador"""
+    worker = DistributedWorker(args, quiet=True)
+    try:
+        worker.run_scan()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.cleanup()
+
+
+class DistributedWorker:
+    """
+    Trabajador del modo distribuido (--join HOST:PORT).
+
+    Pide lotes de URLs al coordinador, descarga y analiza las páginas (o
+    verifica los enlaces) con su propia sesión, limitador de ritmo y
+    concurrencia, y devuelve los estados y enlaces encontrados. No decide
+    qué es nuevo ni guarda reportes: eso lo hace el coordinador.
+    """
+
+    def __init__(self, args, quiet=False):
+        self.args = args
+        self.quiet = quiet or args.quiet
+        self.scanner = WebSpectreScanner(args)
+        settings = self.scanner.settings
+        self.threads = settings['concurrency'] + settings['verify_concurrency']
+        # Con el doble de trabajos que hilos siempre hay algo que empezar mientras llega el siguiente lote
+        self.lease_size = args.lease_size or 2 * self.threads
+        self.worker_id = None
+        self.fingerprints = False
+        self.processed = 0
+
+    def connect(self, timeout=30):
+        """Se conecta al coordinador, reintentando mientras arranca"""
+        host, port = parse_address(self.args.join)
+        key = auth_key(self.args)
+        manager = _WorkerManager(address=(host, port), authkey=key)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                manager.connect()
+                return manager.coordinator()
+            except ConnectionRefusedError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(1)
+
+    def run_scan(self):
+        coordinator = self.connect()
+        config = coordinator.register(f"{socket.gethostname()}:{os.getpid()}")
+        self.worker_id = config['worker_id']
+        self.scanner.url_filter = config['url_filter']
+        self.fingerprints = config['near_duplicates']
+        # Las huellas se calculan sobre el cuerpo completo de la página
+        self.scanner.inline_parse = self.scanner.inline_parse and not self.fingerprints
+        self.scanner.settings['verify_ssl'] = config['verify_ssl']
+        self.scanner.sections.trust_after = config['trust_after']
+        if not self.quiet:
+            print(f"\n[+] Conectado a {self.args.join} como {self.worker_id} ({self.threads} hilos)", flush=True)
+
+        completed = []
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            futures = set()
+            while True:
+                try:
+                    items = coordinator.exchange(
+                        self.worker_id, completed, self.lease_size - len(futures),
+                        self.scanner.metrics.drain()
+                    )
+                except (EOFError, ConnectionError):
+                    if not self.quiet:
+                        print("\n[!] Se perdió la conexión con el coordinador", flush=True)
+                    break
+                self.processed += len(completed)
+                completed = []
+                if items is None:
+                    break
+                futures.update(executor.submit(self.run_item, item) for item in items)
+
+                if not futures:
+                    time.sleep(0.2)
+                    continue
+                done, futures = wait(futures, timeout=0.5, return_when=FIRST_COMPLETED)
+                completed = [future.result() for future in done]
+
+        if not self.quiet:
+            print(f"\n[+] Trabajo terminado: {self.processed} URLs procesadas", flush=True)
+
+    def run_item(self, item):
+        """
+        Procesa un trabajo del coordinador.
+
+        Returns:
+            Tupla (tipo, url, profundidad, es_válida, estado, enlaces, error,
+            huella SimHash o None); el coordinador decide si es casi duplicada
+        """
+        kind, url, depth = item
+        scanner = self.scanner
+        if kind == 'check':
+            is_valid, status = scanner.check_url_status(url)
+            return (kind, url, depth, is_valid, status, [], None, None)
+
+        try:
+            page = scanner.fetch_page(url)
+        except Exception as e:
+            return (kind, url, depth, False, 0, [], str(e), None)
+
+        is_valid = page.status < 400
+        if not is_valid or not scanner.is_parseable(page):
+            return (kind, url, depth, is_valid, page.status, [], None, None)
+        try:
+            fingerprint = simhash(page.body, page.encoding) if self.fingerprints and page.body else None
+            links = page.links if page.links is not None else scanner.extract_links(page)
+            return (kind, url, depth, True, page.status, links, None, fingerprint)
+        except Exception as e:
+            return (kind, url, depth, True, page.status, [], str(e), None)
+
+    def handle_interrupt(self):
+        print("\n[!] Trabajador interrumpido.")
+
+    def handle_error(self, error):
+        print(f"\n[!] Error crítico: {str(error)}")
+
+    def cleanup(self):
+        self.scanner.session.close()
+        if self.scanner.parse_pool is not None:
+            self.scanner.parse_pool.shutdown(cancel_futures=True)
@@ -0,0 +1,205 @@
+"""
+Extractores de enlaces para documentos HTML
+"""
+
+import codecs
+import time
+from html.parser import HTMLParser
+from importlib.util import find_spec
+import warnings
+
+from webspectre_scanner.utils.validator import UrlFilter
+
+# lxml es opcional; lxml y bs4 solo se importan al crear su extractor
+HAS_LXML = find_spec('lxml') is not None
+
+# Etiquetas y atributos de los que se extraen enlaces
+TAGS_MAP = {
+    'a': ('href',),
+    'link': ('href',),
+    'script': ('src',),
+    'iframe': ('src',)
+}
+
+
+class StreamingLinkExtractor(HTMLParser):
+    """
+    Extrae enlaces en una sola pasada con los callbacks de html.parser,
+    sin construir el árbol del documento. Admite recibir el HTML por trozos.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        wanted = TAGS_MAP.get(tag)
+        if not wanted:
+            return
+        # Como BeautifulSoup, ante atributos repetidos gana el último
+        values = dict(attrs)
+        for attr in wanted:
+            value = values.get(attr)
+            if value is not None:
+                self.links.append(value)
+
+    def close(self):
+        super().close()
+        return self.links
+
+
+class _LxmlLinkTarget:
+    """Target de lxml que recibe eventos de apertura sin construir el árbol"""
+
+    def __init__(self):
+        self.links = []
+
+    def start(self, tag, attrib):
+        wanted = TAGS_MAP.get(tag)
+        if not wanted:
+            return
+        for attr in wanted:
+            value = attrib.get(attr)
+            if value is not None:
+                self.links.append(value)
+
+    def close(self):
+        return self.links
+
+
+class LxmlLinkExtractor:
+    """Extractor incremental sobre el parser HTML de lxml (requiere lxml)"""
+
+    def __init__(self):
+        from lxml import etree
+        self.parser = etree.HTMLParser(target=_LxmlLinkTarget(), recover=True)
+        self.empty = True
+
+    def feed(self, data):
+        if data:
+            self.empty = False
+            self.parser.feed(data)
+
+    def close(self):
+        if self.empty:
+            return []
+        return self.parser.close()
+
+
+class SoupLinkExtractor:
+    """Extractor clásico con BeautifulSoup: acumula el documento y lo analiza al cerrar"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def feed(self, data):
+        self.chunks.append(data)
+
+    def close(self):
+        from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", XMLParsedAsHTMLWarning)
+            soup = BeautifulSoup(''.join(self.chunks), 'html.parser')
+        links = []
+        for tag, attrs in TAGS_MAP.items():
+            for element in soup.find_all(tag):
+                for attr in attrs:
+                    if element.has_attr(attr):
+                        links.append(element[attr])
+        return links
+
+
+EXTRACTORS = {
+    'stream': StreamingLinkExtractor,
+    'lxml': LxmlLinkExtractor,
+    'bs4': SoupLinkExtractor
+}
+
+
+def resolve_extractor(name: str) -> str:
+    """
+    Devuelve el nombre del extractor utilizable en este entorno.
+
+    Args:
+        name: Extractor solicitado ('stream', 'lxml' o 'bs4')
+
+    Returns:
+        El mismo nombre, o 'stream' si se pidió lxml y no está instalado
+    """
+    if name not in EXTRACTORS:
+        raise ValueError(f"Extractor desconocido: {name}")
+    if name == 'lxml' and not HAS_LXML:
+        print("[!] lxml no está instalado; se usará el extractor 'stream'")
+        return 'stream'
+    return name
+
+
+def make_extractor(name: str = 'stream'):
+    """Crea un extractor con interfaz feed(texto) / close() -> lista de enlaces"""
+    return EXTRACTORS[name]()
+
+
+def extract_raw_links(html: str, name: str = 'stream') -> list:
+    """Extrae los valores de href/src de un documento HTML completo"""
+    extractor = make_extractor(name)
+    extractor.feed(html)
+    return extractor.close()
+
+
+def parse_and_normalize_timed(base_url: str, body: bytes, encoding: str, name: str,
+                              url_filter) -> tuple:
+    """
+    Decodifica, extrae y normaliza los enlaces de una página midiendo cada fase.
+
+    Es una función de módulo para poder ejecutarse en un ProcessPoolExecutor:
+    recibe bytes y devuelve las URLs normalizadas (sin filtrar visitadas).
+    `url_filter` es un UrlFilter (se envía compilado a los procesos) o una
+    lista de patrones de ruta a excluir.
+
+    Returns:
+        Tupla (enlaces, segundos de análisis, segundos de normalización)
+    """
+    started = time.perf_counter()
+    html = body.decode(encoding or 'utf-8', errors='replace')
+    raw_links = extract_raw_links(html, name)
+    parsed = time.perf_counter()
+
+    if not isinstance(url_filter, UrlFilter):
+        url_filter = UrlFilter(url_filter)
+    found_links = url_filter.normalize_all(base_url, raw_links)
+    return found_links, parsed - started, time.perf_counter() - parsed
+
+
+class IncrementalPageParser:
+    """
+    Extrae los enlaces de una página a medida que se descarga.
+
+    Recibe el cuerpo por trozos de bytes, los decodifica de forma incremental
+    (sin partir caracteres multibyte) y los pasa al extractor, así que el
+    documento completo nunca está en memoria. close() devuelve lo mismo que
+    parse_and_normalize_timed.
+    """
+
+    def __init__(self, base_url: str, encoding: str, name: str, url_filter: UrlFilter):
+        self.base_url = base_url
+        self.url_filter = url_filter
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.extractor = make_extractor(name)
+        self.parse_seconds = 0.0
+
+    def feed(self, chunk: bytes):
+        started = time.perf_counter()
+        self.extractor.feed(self.decoder.decode(chunk))
+        self.parse_seconds += time.perf_counter() - started
+
+    def close(self) -> tuple:
+        """Tupla (enlaces, segundos de análisis, segundos de normalización)"""
+        started = time.perf_counter()
+        self.extractor.feed(self.decoder.decode(b'', final=True))
+        raw_links = self.extractor.close()
+        parsed = time.perf_counter()
+        found_links = self.url_filter.normalize_all(self.base_url, raw_links)
+        return found_links, self.parse_seconds + parsed - started, time.perf_counter() - parsed
@@ -0,0 +1,198 @@
+"""
+Frontera de rastreo: cola de prioridad de URLs pendientes con memoria acotada
+"""
+
+import heapq
+import json
+import os
+import tempfile
+from collections import Counter
+from urllib.parse import urlparse
+
+# Extensiones que suelen servir HTML y por tanto aportan enlaces nuevos
+HTML_EXTENSIONS = ('', '.html', '.htm', '.xhtml', '.php', '.asp', '.aspx', '.jsp', '.cfm')
+
+
+def section_of(url: str) -> str:
+    """Devuelve la sección de una URL (primer segmento de la ruta)"""
+    path = urlparse(url).path.strip('/')
+    return path.split('/', 1)[0]
+
+
+def is_html_likely(url: str) -> bool:
+    """Indica si la URL probablemente devuelve HTML según su extensión"""
+    last = urlparse(url).path.rsplit('/', 1)[-1]
+    ext = os.path.splitext(last)[1].lower()
+    return ext in HTML_EXTENSIONS
+
+
+class SpillFile:
+    """Fichero JSON Lines de entradas (url, depth) volcadas desde la frontera"""
+
+    def __init__(self, spill_dir=None):
+        self.file = tempfile.NamedTemporaryFile(
+            mode='w+b', prefix='webspectre_frontier_',
+            suffix='.jsonl', dir=spill_dir, delete=False
+        )
+        self.read_pos = 0
+        self.count = 0
+
+    def append(self, url, depth):
+        # El descriptor de NamedTemporaryFile no se abre con O_APPEND
+        self.file.seek(0, os.SEEK_END)
+        self.file.write(json.dumps([url, depth]).encode('utf-8') + b'\n')
+        self.count += 1
+
+    def read(self, limit):
+        """Lee hasta `limit` entradas en orden de llegada"""
+        self.file.flush()
+        self.file.seek(self.read_pos)
+        entries = []
+        while len(entries) < limit and self.count:
+            entries.append(json.loads(self.file.readline()))
+            self.count -= 1
+        self.read_pos = self.file.tell()
+        return entries
+
+    def peek_all(self):
+        """Devuelve las entradas pendientes sin consumirlas"""
+        self.file.flush()
+        self.file.seek(self.read_pos)
+        return [json.loads(line) for line in self.file.read().splitlines()]
+
+    def close(self):
+        self.file.close()
+        os.unlink(self.file.name)
+
+
+class Frontier:
+    """
+    Cola de URLs pendientes respaldada por un heap.
+
+    El orden de salida prioriza, por este orden: menor profundidad, URLs que
+    probablemente son HTML antes que recursos, y turnos rotatorios entre
+    secciones del sitio. A igualdad se respeta el orden de llegada.
+
+    Cuando hay más de `max_memory` entradas en memoria, las nuevas se vuelcan
+    a ficheros temporales (uno por profundidad) y se recargan cuando su
+    profundidad pasa a ser la más prioritaria, de forma que la memoria queda
+    acotada en sitios enormes sin romper el orden por niveles del BFS.
+    """
+
+    def __init__(self, max_memory=100000, spill_dir=None):
+        self.max_memory = max(1, max_memory)
+        self.spill_dir = spill_dir
+        self.heap = []
+        self.section_turns = Counter()
+        self.seq = 0
+        self.spills = {}
+        self.spilled = 0
+
+    def __len__(self):
+        return len(self.heap) + self.spilled
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def push(self, url: str, depth: int):
+        """Añade una URL a la frontera con la profundidad a la que se encontró"""
+        if len(self.heap) >= self.max_memory:
+            spill = self.spills.get(depth)
+            if spill is None:
+                spill = self.spills[depth] = SpillFile(self.spill_dir)
+            spill.append(url, depth)
+            self.spilled += 1
+            return
+        heapq.heappush(self.heap, self._entry(url, depth))
+
+    def pop(self):
+        """Extrae la siguiente URL a rastrear como (url, depth)"""
+        if self.spilled:
+            depth = min(self.spills)
+            if not self.heap or depth < self.heap[0][0]:
+                self._reload(depth)
+        entry = heapq.heappop(self.heap)
+        return entry[-2], entry[-1]
+
+    def items(self):
+        """Lista de todas las entradas pendientes como (url, depth), en memoria y en disco"""
+        entries = [(entry[-2], entry[-1]) for entry in self.heap]
+        for spill in self.spills.values():
+            entries.extend((url, depth) for url, depth in spill.peek_all())
+        return entries
+
+    def close(self):
+        """Elimina los ficheros de volcado si existen"""
+        for spill in self.spills.values():
+            spill.close()
+        self.spills.clear()
+        self.spilled = 0
+
+    def _entry(self, url, depth):
+        section = section_of(url)
+        turn = self.section_turns[section]
+        self.section_turns[section] += 1
+        self.seq += 1
+        return (depth, 0 if is_html_likely(url) else 1, turn, self.seq, url, depth)
+
+    def _reload(self, depth):
+        """Recarga en el heap entradas volcadas de una profundidad"""
+        limit = max(1, self.max_memory - len(self.heap))
+        spill = self.spills[depth]
+        for url, entry_depth in spill.read(limit):
+            heapq.heappush(self.heap, self._entry(url, entry_depth))
+            self.spilled -= 1
+
+        if not spill.count:
+            spill.close()
+            del self.spills[depth]
+
+
+class LevelGate:
+    """
+    Retiene los enlaces de las páginas descargadas hasta que no queda ninguna
+    página menos profunda pendiente (en la frontera o en curso).
+
+    Con peticiones concurrentes una página de nivel 3 puede terminar antes
+    que otra de nivel 2 que enlaza a las mismas URLs; si sus enlaces se
+    enrutaran primero, esas URLs se descubrirían un nivel por debajo del que
+    les toca y sus propios enlaces quedarían fuera de la profundidad máxima.
+    Enrutando por niveles cada URL se descubre a su profundidad mínima, como
+    en un BFS secuencial, sin frenar las descargas en curso.
+    """
+
+    def __init__(self):
+        self.pending = Counter()
+        self.held = []
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.held)
+
+    def add(self, depth: int):
+        """Cuenta una página encolada a cierta profundidad"""
+        self.pending[depth] += 1
+
+    def done(self, url: str, depth: int, links):
+        """Registra una página terminada y retiene sus enlaces"""
+        self.pending[depth] -= 1
+        if not self.pending[depth]:
+            del self.pending[depth]
+        self.seq += 1
+        heapq.heappush(self.held, (depth, self.seq, url, links))
+
+    def ready(self):
+        """Extrae por niveles las páginas cuyos enlaces ya pueden enrutarse, como (url, depth, links)"""
+        while self.held and (not self.pending or self.held[0][0] <= min(self.pending)):
+            depth, _, url, links = heapq.heappop(self.held)
+            yield url, depth, links
+
+    def items(self):
+        """Páginas retenidas como (url, depth); al reanudar se vuelven a rastrear"""
+        return [(url, depth) for depth, _, url, _ in self.held]
@@ -0,0 +1,288 @@
+"""
+Contadores, histogramas y medidores de las fases del escaneo
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Límites superiores (en segundos) de los cubos de los histogramas de tiempos
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+HELP = {
+    'http_requests': 'Peticiones HTTP realizadas',
+    'http_responses': 'Respuestas HTTP por clase de estado',
+    'http_errors': 'Peticiones HTTP fallidas sin respuesta',
+    'http_bytes': 'Bytes de cuerpo descargados',
+    'http_version': 'Respuestas por versión de HTTP',
+    'http_in_flight': 'Peticiones HTTP en curso',
+    'dns_seconds': 'Tiempo de resolución DNS',
+    'connect_seconds': 'Tiempo de establecimiento de conexión TCP',
+    'tls_seconds': 'Tiempo de negociación TLS',
+    'ttfb_seconds': 'Tiempo hasta el primer byte de la respuesta',
+    'download_seconds': 'Tiempo de descarga del cuerpo',
+    'parse_seconds': 'Tiempo de análisis del HTML',
+    'normalize_seconds': 'Tiempo de normalización de enlaces',
+    'status_cache': 'Consultas a la caché de estados por resultado',
+    'pages': 'Páginas descargadas',
+    'near_duplicates': 'Páginas casi duplicadas cuyos enlaces no se siguen',
+    'section_skipped': 'URLs que solo se verifican por el presupuesto de su sección, por motivo',
+    'sitemap_files': 'Sitemaps descargados (índices incluidos)',
+    'sitemap_urls': 'URLs sembradas desde los sitemaps',
+    'sitemap_unchanged': 'Páginas sin cambios según el lastmod del sitemap, reutilizadas de la caché',
+    'body_skipped': 'Cuerpos de página no descargados o truncados, por motivo',
+    'section_trusted': 'Enlaces dados por válidos sin petición por la fiabilidad de su sección',
+    'frontier': 'URLs pendientes en la frontera',
+    'pages_in_flight': 'Páginas en descarga',
+    'verify_pending': 'Enlaces pendientes de verificación',
+    'workers': 'Trabajadores conectados al coordinador',
+}
+
+
+class Histogram:
+    """Histograma de cubos fijos al estilo Prometheus"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'Histogram'):
+        """Suma las observaciones de otro histograma con los mismos cubos"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Estimación del cuantil q (0-1) interpolando dentro del cubo que lo contiene"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p90': round(self.quantile(0.9), 6),
+            'p99': round(self.quantile(0.99), 6),
+            'max': round(self.max, 6),
+        }
+
+
+class ScanMetrics:
+    """
+    Registro de métricas de un escaneo, seguro entre hilos.
+
+    Guarda contadores (con etiquetas opcionales), histogramas de tiempos y
+    medidores. Los medidores pueden ser valores que se ajustan con add_gauge
+    o funciones registradas con watch, que se evalúan al tomar una instantánea
+    (profundidad de la frontera, trabajos en vuelo...).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.watchers = {}
+
+    def inc(self, name: str, amount: int = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def add_gauge(self, name: str, amount: float):
+        with self.lock:
+            self.gauges[name] = self.gauges.get(name, 0) + amount
+
+    def watch(self, name: str, read, owner=None):
+        """
+        Registra una función sin argumentos que devuelve el valor actual de un
+        medidor. Si varios propietarios vigilan el mismo medidor (varios
+        objetivos en modo lote) sus valores se suman.
+        """
+        with self.lock:
+            self.watchers[(name, id(owner))] = read
+
+    def unwatch(self, *names, owner=None):
+        with self.lock:
+            for name in names:
+                self.watchers.pop((name, id(owner)), None)
+
+    def drain(self):
+        """
+        Devuelve los contadores e histogramas acumulados y los pone a cero, para
+        enviarlos a otro registro (un trabajador a su coordinador).
+        """
+        with self.lock:
+            counters, histograms = self.counters, self.histograms
+            self.counters, self.histograms = {}, {}
+        return counters, histograms
+
+    def merge(self, counters: dict, histograms: dict):
+        """Suma contadores e histogramas obtenidos con drain() de otro registro"""
+        with self.lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, other in histograms.items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram(other.buckets)
+                histogram.merge(other)
+
+    def counter(self, name: str, **labels) -> int:
+        """Valor de un contador; sin etiquetas suma todas sus series"""
+        with self.lock:
+            if labels:
+                return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+            return sum(value for (key, _), value in self.counters.items() if key == name)
+
+    def gauge_values(self) -> dict:
+        with self.lock:
+            values = dict(self.gauges)
+            watchers = list(self.watchers.items())
+        watched = {}
+        for (name, _), read in watchers:
+            try:
+                watched[name] = watched.get(name, 0) + read()
+            except Exception:
+                pass
+        values.update(watched)
+        return values
+
+    def cache_hit_rate(self):
+        hits = self.counter('status_cache', result='hit') + self.counter('status_cache', result='persistent')
+        total = hits + self.counter('status_cache', result='miss')
+        return hits / total if total else None
+
+    def snapshot(self) -> dict:
+        """Sección de métricas legible por máquina para el reporte"""
+        with self.lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                label = ','.join(f"{k}={v}" for k, v in labels)
+                counters[f"{name}{{{label}}}" if label else name] = value
+            timings = {name: h.summary() for name, h in sorted(self.histograms.items())}
+
+        hit_rate = self.cache_hit_rate()
+        return {
+            'elapsed_sec': round(time.monotonic() - self.started, 3),
+            'counters': counters,
+            'timings_sec': timings,
+            'gauges': self.gauge_values(),
+            'status_cache_hit_rate': round(hit_rate, 4) if hit_rate is not None else None,
+        }
+
+    def stats_line(self) -> str:
+        """Línea de estado en vivo con el ritmo y los tiempos principales"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        pages = self.counter('pages')
+        requests = self.counter('http_requests')
+        gauges = self.gauge_values()
+        with self.lock:
+            ttfb = self.histograms.get('ttfb_seconds')
+            parse = self.histograms.get('parse_seconds')
+            ttfb_p50 = ttfb.quantile(0.5) * 1000 if ttfb else 0.0
+            parse_p50 = parse.quantile(0.5) * 1000 if parse else 0.0
+        hit_rate = self.cache_hit_rate()
+
+        return (
+            f"[~] {pages} páginas ({pages / elapsed:.1f}/s) | {requests} peticiones ({requests / elapsed:.1f}/s) | "
+            f"frontera {gauges.get('frontier', 0)} | páginas en vuelo {gauges.get('pages_in_flight', 0)} | "
+            f"HTTP en vuelo {gauges.get('http_in_flight', 0)} | por verificar {gauges.get('verify_pending', 0)} | "
+            f"TTFB p50 {ttfb_p50:.0f}ms | análisis p50 {parse_p50:.1f}ms | "
+            f"caché {'-' if hit_rate is None else f'{hit_rate:.0%}'}"
+        )
+
+    def to_prometheus(self, prefix: str = 'webspectre') -> str:
+        """Exporta las métricas en el formato de texto de Prometheus"""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}_total"
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+            label = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{metric}{{{label}}} {value}" if label else f"{metric} {value}")
+
+        for name, histogram in histograms:
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.sum:.6f}")
+            lines.append(f"{metric}_count {histogram.count}")
+
+        for name, value in sorted(self.gauge_values().items()):
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Escribe las métricas en un fichero de texto para el textfile collector de Prometheus"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+class StatsTicker:
+    """Decide cuándo imprimir la línea de estado en vivo"""
+
+    def __init__(self, metrics: ScanMetrics, interval: float):
+        self.metrics = metrics
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def tick(self):
+        if self.interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self.last >= self.interval:
+            self.last = now
+            print(f"\n{self.metrics.stats_line()}", flush=True)
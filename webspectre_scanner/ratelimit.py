@@ -0,0 +1,135 @@
+"""
+Limitador de peticiones por host con token bucket y backoff adaptativo
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlparse
+
+# Respuestas que indican que el servidor pide bajar el ritmo
+BACKOFF_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """Token bucket con reservas: cada llamada consume un token aunque tenga que esperar"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.last = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Consume un token y devuelve los segundos que hay que esperar para usarlo"""
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostRateLimiter:
+    """
+    Reparte el ritmo de peticiones por host.
+
+    Cada host tiene su propio token bucket de `rate` peticiones/segundo con
+    ráfagas de hasta `burst`. En modo adaptativo se aplica AIMD: una respuesta
+    429/503 divide a la mitad el ritmo del host (y respeta Retry-After) y cada
+    respuesta correcta lo recupera poco a poco hasta el máximo configurado.
+    """
+
+    def __init__(self, rate=5.0, burst=10, adaptive=False, enabled=True,
+                 min_rate=0.1, increase=0.1):
+        self.rate = rate
+        self.burst = burst
+        self.adaptive = adaptive
+        self.enabled = enabled and rate > 0
+        self.min_rate = min(min_rate, rate) if rate > 0 else min_rate
+        self.increase = increase
+        self.buckets = {}
+        self.blocked_until = {}
+        self.lock = threading.Lock()
+
+    def delay(self, url: str) -> float:
+        """Reserva un turno para la URL y devuelve la espera necesaria en segundos"""
+        if not self.enabled:
+            return 0.0
+
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+            wait = bucket.reserve(now)
+            blocked = self.blocked_until.get(host, 0) - now
+            return max(wait, blocked)
+
+    def acquire(self, url: str):
+        """Bloquea el hilo actual hasta que se pueda pedir la URL"""
+        wait = self.delay(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str):
+        """Versión asíncrona de acquire"""
+        wait = self.delay(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def feedback(self, url: str, status: int, retry_after: Optional[str] = None):
+        """Ajusta el ritmo del host según la respuesta obtenida (solo en modo adaptativo)"""
+        if not self.enabled or not self.adaptive:
+            return
+
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                return
+
+            if status in BACKOFF_STATUSES:
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+                pause = parse_retry_after(retry_after)
+                if pause:
+                    self.blocked_until[host] = time.monotonic() + pause
+            elif 0 < status < 400 and bucket.rate < self.rate:
+                bucket.rate = min(self.rate, bucket.rate + self.increase)
+
+    def describe(self) -> str:
+        """Texto corto con la configuración para el resumen de la CLI"""
+        if not self.enabled:
+            return "sin límite"
+        mode = ", adaptativo" if self.adaptive else ""
+        return f"{self.rate:g} req/s por host (ráfaga {self.burst}{mode})"
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """
+    Interpreta la cabecera Retry-After.
+
+    Args:
+        value: Segundos o fecha HTTP
+
+    Returns:
+        Segundos a esperar (0 si la cabecera falta o no es válida)
+    """
+    if not value:
+        return 0.0
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -7,10 +7,10 @@ import os
 import time
 from datetime import datetime
 from dataclasses import dataclass
+from itertools import islice
 from urllib.parse import urlparse
 
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from webspectre_scanner.reports.pdf import LETTER, render_full_pdf, render_in_background
 
 
 @dataclass
@@ -20,48 +20,64 @@ class ScanReport:
     valid_links: list
     errors: list
     filename: str = None
+    pdf_filename: str = None
+    metrics: dict = None
 
     def to_dict(self):
         """Convierte el reporte a diccionario"""
-        return {
+        data = {
             "metadata": self.metadata,
             "stats": self.stats,
-            "valid_links": sorted(self.valid_links),
+            "valid_links": list(self.valid_links),
             "errors": self.errors
         }
-
-    def save(self, output_dir=None):
-        """Guarda el reporte en un archivo JSON y PDF"""
-        report_data = self.to_dict()
-        
-        target = self.metadata['target']
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        json_name = f"scan_{target}_{timestamp}.json"
-        pdf_name = f"scan_{target}_{timestamp}.pdf"
-
-        if output_dir:
-            os.makedirs(output_dir, exist_ok=True)
-            json_path = os.path.join(output_dir, json_name)
-            pdf_path = os.path.join(output_dir, pdf_name)
+        if self.metrics is not None:
+            data["metrics"] = self.metrics
+        return data
+
+    def save(self, output_dir=None, fmt='json', writer=None, pdf='summary', pdf_background=False):
+        """
+        Guarda el reporte en JSON (o JSON Lines) y PDF.
+
+        Args:
+            output_dir: Directorio de salida
+            fmt: 'json' (indentado), 'compact' (sin indentar) o 'ndjson'
+            writer: StreamingReportWriter usado durante el escaneo (solo con 'ndjson')
+            pdf: 'summary' (primeras URLs), 'full' (todas) o 'none' (sin PDF)
+            pdf_background: Genera el PDF completo en otro proceso a partir del reporte guardado
+        """
+        if fmt == 'ndjson':
+            writer.write_summary(self.metadata, self.stats, metrics=self.metrics)
+            self.filename = writer.path
+            base_path = os.path.splitext(writer.path)[0]
         else:
-            json_path = json_name
-            pdf_path = pdf_name
-
-        self.filename = json_path
-
-        # Guardar JSON
-        with open(json_path, 'w') as f:
-            json.dump(report_data, f, indent=2)
+            base_path = report_basename(self.metadata['target'], output_dir)
+            self.filename = f"{base_path}.json"
+            with open(self.filename, 'w') as f:
+                if fmt == 'compact':
+                    json.dump(self.to_dict(), f, separators=(',', ':'))
+                else:
+                    json.dump(self.to_dict(), f, indent=2)
 
         # Guardar PDF
-        self._save_pdf(pdf_path)
+        if pdf == 'none':
+            return self.filename
+
+        self.pdf_filename = f"{base_path}.pdf"
+        if pdf == 'full' and pdf_background:
+            render_in_background(self.filename, self.pdf_filename)
+        elif pdf == 'full':
+            render_full_pdf(self.pdf_filename, self.metadata, self.stats, self.valid_links, self.errors)
+        else:
+            self._save_pdf(self.pdf_filename)
 
         return self.filename
 
     def _save_pdf(self, pdf_path):
         """Guarda el reporte como un archivo PDF"""
-        c = canvas.Canvas(pdf_path, pagesize=letter)
-        width, height = letter
+        from reportlab.pdfgen import canvas
+        c = canvas.Canvas(pdf_path, pagesize=LETTER)
+        width, height = LETTER
         y = height - 40
 
         c.setFont("Helvetica-Bold", 14)
@@ -84,7 +100,7 @@ class ScanReport:
         c.drawString(30, y, "URLs válidas:")
         y -= 20
         c.setFont("Helvetica", 10)
-        for link in self.valid_links[:30]:  # Limita a 30 para evitar desbordes
+        for link in islice(self.valid_links, 30):  # Limita a 30 para evitar desbordes
             if y < 40:
                 c.showPage()
                 c.setFont("Helvetica", 10)
@@ -92,7 +108,7 @@ class ScanReport:
             c.drawString(40, y, link)
             y -= 15
 
-        if len(self.valid_links) > 30:
+        if self.stats['valid_urls'] > 30:
             c.drawString(40, y, "... (más URLs no mostradas)")
             y -= 20
 
@@ -115,10 +131,28 @@ class ScanReport:
         c.save()
 
 
-def generate_report(visited, valid_links, invalid_links, errors, start_time, args):
-    """Genera un reporte estructurado del escaneo"""
+def report_basename(target, output_dir=None):
+    """Ruta base (sin extensión) de los ficheros de reporte de un objetivo"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    name = f"scan_{target}_{timestamp}"
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, name)
+    return name
+
+
+def generate_report(start_url, valid_links, invalid_links, errors, start_time, args,
+                    materialize=True, metrics=None):
+    """
+    Genera un reporte estructurado del escaneo de `start_url` (None si el
+    escaneo no llegó a empezar).
+
+    Con materialize=False no se copian las URLs válidas (el reporte en
+    streaming ya las contiene) y valid_links queda como el iterable recibido.
+    `metrics` es la instantánea de ScanMetrics que se añade como sección aparte.
+    """
     elapsed = time.time() - start_time
-    target = urlparse(next(iter(visited))).netloc if visited else "unknown"
+    target = urlparse(start_url).netloc if start_url else "unknown"
     
     return ScanReport(
         metadata={
@@ -136,6 +170,7 @@ def generate_report(visited, valid_links, invalid_links, errors, start_time, arg
             "invalid_urls": len(invalid_links),
             "error_count": len(errors)
         },
-        valid_links=list(valid_links),
-        errors=errors
+        valid_links=sorted(valid_links) if materialize else valid_links,
+        errors=errors,
+        metrics=metrics
     )
@@ -0,0 +1,164 @@
+"""
+Generación rápida de reportes PDF completos
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# Tamaño carta en puntos (reportlab.lib.pagesizes.letter); reportlab solo se
+# importa al generar un PDF
+PAGE_WIDTH, PAGE_HEIGHT = LETTER = (612.0, 792.0)
+MARGIN = 40
+FONT_SIZE = 8
+LINE_HEIGHT = 10
+MAX_CHARS = 135
+
+
+class PdfTableWriter:
+    """
+    Dibuja listados largos en páginas sucesivas.
+
+    Cada página se escribe con un único objeto de texto de reportlab (en vez
+    de un drawString por línea), repitiendo el título de la tabla en cada
+    página y numerando las páginas en el pie.
+    """
+
+    def __init__(self, pdf_path, metadata):
+        from reportlab.pdfgen import canvas
+        self.canvas = canvas.Canvas(pdf_path, pagesize=LETTER, pageCompression=1)
+        self.target = metadata['target']
+        self.page = 1
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def summary(self, metadata, stats):
+        """Bloque inicial con los datos generales del escaneo"""
+        c = self.canvas
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(30, self.y, f"WebSpectre Report - {metadata['target']}")
+        self.y -= 30
+
+        text = c.beginText(30, self.y)
+        text.setFont("Helvetica", 12)
+        text.setLeading(20)
+        text.textLine(f"Fecha de escaneo: {metadata['scan_date']}")
+        text.textLine(f"Duración: {metadata['duration_sec']} segundos")
+        text.textLine(f"URLs válidas: {stats['valid_urls']}")
+        text.textLine(f"URLs inválidas: {stats['invalid_urls']}")
+        text.textLine(f"Errores: {stats['error_count']}")
+        c.drawText(text)
+        self.y -= 5 * 20 + 10
+
+    def table(self, title, rows):
+        """Escribe todas las filas de un iterable paginando según haga falta"""
+        text = None
+        self._title(title)
+
+        for index, row in enumerate(rows, 1):
+            if self.y < MARGIN:
+                self.canvas.drawText(text)
+                text = None
+                self._new_page()
+                self._title(f"{title} (cont.)")
+
+            if text is None:
+                text = self.canvas.beginText(MARGIN, self.y)
+                text.setFont("Helvetica", FONT_SIZE)
+                text.setLeading(LINE_HEIGHT)
+
+            row = str(row).strip().replace('\n', ' ')
+            if len(row) > MAX_CHARS:
+                row = row[:MAX_CHARS - 3] + '...'
+            text.textLine(f"{index:>7}  {row}")
+            self.y -= LINE_HEIGHT
+
+        if text is not None:
+            self.canvas.drawText(text)
+        self.y -= 15
+
+    def save(self):
+        self._footer()
+        self.canvas.save()
+
+    def _title(self, title):
+        if self.y < MARGIN + 40:
+            self._new_page()
+        self.canvas.setFont("Helvetica-Bold", 12)
+        self.canvas.drawString(30, self.y, title)
+        self.y -= 18
+
+    def _new_page(self):
+        self._footer()
+        self.canvas.showPage()
+        self.page += 1
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def _footer(self):
+        self.canvas.setFont("Helvetica", 7)
+        self.canvas.drawRightString(
+            PAGE_WIDTH - MARGIN, 20, f"WebSpectre - {self.target} - Página {self.page}"
+        )
+
+
+def render_full_pdf(pdf_path, metadata, stats, links, errors):
+    """
+    Genera un PDF con todas las URLs válidas y todos los errores.
+
+    Args:
+        pdf_path: Ruta del PDF a crear
+        metadata: Metadatos del reporte
+        stats: Estadísticas del reporte
+        links: Iterable de URLs válidas (se recorre una sola vez)
+        errors: Iterable de mensajes de error (se recorre una sola vez)
+    """
+    writer = PdfTableWriter(pdf_path, metadata)
+    writer.summary(metadata, stats)
+    writer.table("URLs válidas:", links)
+    writer.table("Errores encontrados:", errors)
+    writer.save()
+
+
+def render_from_report(report_path, pdf_path):
+    """Genera el PDF completo a partir de un reporte JSON o JSON Lines ya guardado"""
+    if report_path.endswith('.ndjson'):
+        summary = None
+        for record in _read_ndjson(report_path):
+            if record['type'] == 'summary':
+                summary = record
+        links = (r['url'] for r in _read_ndjson(report_path) if r['type'] == 'url' and r['valid'])
+        errors = (r['message'] for r in _read_ndjson(report_path) if r['type'] == 'error')
+        render_full_pdf(pdf_path, summary['metadata'], summary['stats'], links, errors)
+        return
+
+    with open(report_path) as f:
+        data = json.load(f)
+    render_full_pdf(pdf_path, data['metadata'], data['stats'], data['valid_links'], data['errors'])
+
+
+def render_in_background(report_path, pdf_path):
+    """Lanza la generación del PDF en un proceso independiente y no espera a que termine"""
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+    subprocess.Popen(
+        [sys.executable, '-m', 'webspectre_scanner.reports.pdf', report_path, pdf_path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        start_new_session=True
+    )
+
+
+def _read_ndjson(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Uso: python -m webspectre_scanner.reports.pdf REPORTE PDF")
+    render_from_report(sys.argv[1], sys.argv[2])
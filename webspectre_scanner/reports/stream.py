@@ -0,0 +1,55 @@
+"""
+Escritura incremental de reportes en formato JSON Lines
+"""
+
+import json
+import threading
+
+
+class StreamingReportWriter:
+    """
+    Escribe el reporte como JSON Lines a medida que avanza el escaneo.
+
+    Cada URL clasificada y cada error se emiten como un registro en cuanto se
+    producen, y al final se añade un registro de resumen con metadatos y
+    estadísticas. La memoria usada no depende del tamaño del rastreo y el
+    fichero es legible aunque el escaneo se interrumpa.
+    """
+
+    FLUSH_EVERY = 200
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def write_url(self, url: str, is_valid: bool, status: int):
+        self._write({"type": "url", "url": url, "valid": is_valid, "status": status})
+
+    def write_error(self, message: str):
+        self._write({"type": "error", "message": message.strip()})
+
+    def write_summary(self, metadata: dict, stats: dict, partial: bool = False, metrics: dict = None):
+        """Escribe el registro final de resumen y cierra el fichero"""
+        record = {"type": "summary", "partial": partial, "metadata": metadata, "stats": stats}
+        if metrics is not None:
+            record["metrics"] = metrics
+        self._write(record)
+        self.close()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def _write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(line + '\n')
+            self.pending += 1
+            if self.pending >= self.FLUSH_EVERY:
+                self.file.flush()
+                self.pending = 0
@@ -3,23 +3,33 @@ Módulo principal que contiene la lógica del escáner
 """
 
 import os
+import json
 import time
-import random
-from typing import NamedTuple, Set, Dict, List
-from urllib.parse import urljoin, urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-import requests
-from bs4 import BeautifulSoup
-from bs4 import XMLParsedAsHTMLWarning
-import warnings
-
-from colorama import Fore, Back, Style
-from rich.console import Console
+import threading
+from typing import NamedTuple, List, Optional
+import multiprocessing
+from urllib.parse import urlparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 from webspectre_scanner.utils.colors import print_shaded_text
-from webspectre_scanner.utils.validator import validate_url, is_excluded_url
-from webspectre_scanner.reports.generator import generate_report
+from webspectre_scanner.utils.validator import UrlFilter, validate_url
+from webspectre_scanner.reports.generator import generate_report, report_basename
+from webspectre_scanner.reports.stream import StreamingReportWriter
+from webspectre_scanner.verifier import LinkVerifier
+from webspectre_scanner.frontier import Frontier, LevelGate
+from webspectre_scanner.extractors import (
+    IncrementalPageParser, parse_and_normalize_timed, resolve_extractor
+)
+from webspectre_scanner.ratelimit import HostRateLimiter
+from webspectre_scanner.cache import PersistentStatusCache
+from webspectre_scanner.checkpoint import CheckpointJournal, load_checkpoint
+from webspectre_scanner.urlstore import UrlStore
+from webspectre_scanner.metrics import ScanMetrics, StatsTicker
+from webspectre_scanner.canonical import Canonicalizer
+from webspectre_scanner.simhash import NearDuplicateIndex, simhash
+from webspectre_scanner.sections import SectionBudget
+from webspectre_scanner.sitemaps import SitemapSeeder
+from webspectre_scanner.transport import Http2Session, guess_encoding, iter_body, open_session
 from datetime import datetime
 
 from typing import NamedTuple
@@ -49,40 +59,197 @@ class Color(NamedTuple):
             int(start.blue + (end.blue - start.blue) * alpha),
         )
 
-# Configuración inicial
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+class FetchResult(NamedTuple):
+    """Resultado de una única petición GET a una página"""
+    url: str
+    status: int
+    content_type: str
+    body: bytes
+    encoding: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    links: Optional[List[str]] = None
+
+    @property
+    def text(self) -> str:
+        """Cuerpo decodificado como texto"""
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+# Tipos de contenido de los que merece la pena extraer enlaces
+PARSEABLE_TYPES = ('text/html', 'application/xhtml+xml', 'text/xml', 'application/xml')
+
+# Trozos en los que se descarga el cuerpo de las páginas
+BODY_CHUNK_SIZE = 64 * 1024
 
 class WebSpectreScanner:
-    def __init__(self, args):
+    def __init__(self, args, shared=None):
+        """
+        Args:
+            args: Argumentos de la línea de comandos
+            shared: Escáner del que reutilizar sesión, métricas, limitador de
+                ritmo, caché persistente, pool de análisis y loop asíncrono (modo lote)
+        """
         self.args = args
-        self.visited: Set[str] = set()
-        self.valid_links: Set[str] = set()
-        self.invalid_links: Set[str] = set()
+        self.batch = shared is not None
+        self.cancel = threading.Event()
+        self.url_store = UrlStore(bloom_fp=args.bloom_fp, bloom_capacity=args.bloom_capacity)
+        self.visited = self.url_store.visited
+        self.leaf_links = self.url_store.leaf_links
+        self.valid_links = self.url_store.valid_links
+        self.invalid_links = self.url_store.invalid_links
         self.errors: List[str] = []
-        self.url_status_cache: Dict[str, tuple] = {}
+        self.errors_lock = threading.Lock()
+        self.url_status_cache = self.url_store.url_status_cache
         self.start_time = None
         
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5'
-        })
-        
         self.settings = {
             'max_pages_per_section': args.max_pages,
             'exclude_paths': ['wp-json', 'feed', 'wp-admin', 'xmlrpc.php', 'oembed'],
-            'trust_categories': True,
-            'verify_ssl': not args.no_verify
+            'section_patience': args.section_patience,
+            'verify_ssl': not args.no_verify,
+            'engine': args.engine,
+            'concurrency': args.concurrency or (100 if args.engine == 'async' else 3),
+            'verify_concurrency': args.verify_concurrency,
+            'verify_per_host': args.verify_per_host,
+            'frontier_max': args.frontier_max,
+            'frontier_spill_dir': args.frontier_spill_dir,
+            'max_body_size': args.max_body_size,
+            'parser': resolve_extractor(args.parser)
         }
+        # Cada hilo de páginas y de verificación puede tener una conexión abierta al mismo host
+        self.settings['pool_size'] = args.pool_size or max(
+            10, self.settings['concurrency'] + self.settings['verify_concurrency']
+        )
+
+        if shared is not None:
+            self.share_resources(shared)
+        else:
+            self.open_resources(args)
+
+        # Puntos de control: al reanudar se sigue guardando en el mismo fichero
+        self.checkpoint = None
+        self.resume_state = load_checkpoint(args.resume) if args.resume else None
+        checkpoint_path = args.checkpoint or args.resume
+        if checkpoint_path:
+            self.checkpoint = CheckpointJournal(checkpoint_path, args.checkpoint_interval)
+        self.crawl_target = None
+        # URL -> lastmod declarado en el sitemap (solo con caché persistente)
+        self.sitemap_lastmod = {}
+        self.pending_work = None
+        self.report_writer = None
         
         if args.fast_scan:
             self.settings.update({
                 'max_pages_per_section': 10,
-                'trust_categories': True,
+                'section_patience': args.section_patience or 5,
                 'exclude_paths': self.settings['exclude_paths'] + ['api', 'ajax']
             })
 
+        # Reglas de exclusión compiladas una vez para todos los enlaces del escaneo;
+        # las URLs se canonicalizan para que visited no guarde variantes de la misma
+        self.canonicalizer = Canonicalizer(
+            trailing_slash=args.trailing_slash,
+            strip_index=args.strip_index,
+            ignore_case=args.ignore_case,
+            merge_schemes=args.merge_schemes,
+            keep_params=args.keep_params
+        )
+        self.url_filter = UrlFilter(
+            self.settings['exclude_paths'], args.include, args.exclude,
+            canonicalizer=self.canonicalizer
+        )
+        self.near_duplicates = NearDuplicateIndex(args.simhash_distance) if args.near_duplicates else None
+        # Sin pool de análisis ni huellas SimHash los enlaces se extraen durante
+        # la descarga y el cuerpo de la página no se guarda
+        self.inline_parse = self.parse_pool is None and self.near_duplicates is None
+        self.sections = SectionBudget(
+            max_pages=self.settings['max_pages_per_section'],
+            budget=args.section_budget,
+            patience=self.settings['section_patience'],
+            trust_after=args.trust_after,
+            metrics=self.metrics
+        )
+
+    def open_resources(self, args):
+        """Crea la sesión HTTP, las métricas, el limitador, la caché y el pool de análisis"""
+        # Métricas por fase: el adaptador mide DNS, conexión, TTFB y descarga
+        self.metrics = ScanMetrics()
+        self.stats_ticker = StatsTicker(self.metrics, args.stats_interval)
+        # Solo en modo lote con --engine async (ver BatchScanner)
+        self.shared_loop = None
+
+        self.session = open_session(
+            self.metrics,
+            pool_size=self.settings['pool_size'],
+            pool_hosts=args.pool_hosts,
+            max_connections=args.max_connections,
+            retries=args.retries,
+            backoff=args.retry_backoff,
+            keep_alive=not args.no_keep_alive,
+            http2=args.http2,
+            verify=self.settings['verify_ssl']
+        )
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5'
+        })
+
+        self.rate_limiter = HostRateLimiter(
+            rate=args.rate,
+            burst=args.burst,
+            adaptive=args.adaptive_rate,
+            enabled=not args.no_politeness
+        )
+
+        self.persistent_cache = None
+        if args.cache_file:
+            self.persistent_cache = PersistentStatusCache(
+                args.cache_file,
+                ttl=args.cache_ttl,
+                max_entries=args.cache_max_entries
+            )
+
+        # El análisis de HTML puede repartirse entre varios procesos (fuera del GIL)
+        self.parse_pool = None
+        if args.parse_workers > 0:
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=args.parse_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+
+    def share_resources(self, shared):
+        """Reutiliza los recursos de otro escáner en vez de crear los propios"""
+        self.metrics = shared.metrics
+        self.stats_ticker = shared.stats_ticker
+        self.session = shared.session
+        self.rate_limiter = shared.rate_limiter
+        self.persistent_cache = shared.persistent_cache
+        self.parse_pool = shared.parse_pool
+        self.shared_loop = shared.shared_loop
+
+    def describe_pool(self):
+        """Resumen legible de la configuración del pool de conexiones"""
+        parts = [
+            'HTTP/2' if isinstance(self.session, Http2Session) else 'HTTP/1.1',
+            f"{self.settings['pool_size']} por host"
+        ]
+        if self.args.max_connections:
+            parts.append(f"{self.args.max_connections} en total")
+        if self.args.retries:
+            parts.append(f"{self.args.retries} reintentos (backoff {self.args.retry_backoff:g}s)")
+        if self.args.no_keep_alive:
+            parts.append('sin keep-alive')
+        return ', '.join(parts)
+
+    def describe_distributed(self):
+        """Resumen legible de la configuración del modo distribuido"""
+        parts = [f"{self.args.workers} trabajadores locales"]
+        if self.args.listen:
+            parts.append(f"escucha en {self.args.listen}")
+        parts.append(f"{self.args.partitions} particiones por {'host' if self.args.partition_by == 'host' else 'host y sección'}")
+        return ', '.join(parts)
+
     def print_banner(self):
         """Muestra el banner de la herramienta con efecto degradado"""
         # Definir colores para el degradado (verde oscuro a verde claro)
@@ -118,150 +285,728 @@ class WebSpectreScanner:
 	
     def run_scan(self):
         """Ejecuta el escaneo completo"""
-        self.print_banner()
-        
-        target_url = self.args.url if self.args.url else input("\n[ 🌐] Enter URL (e.g., https://example.com): ")
-        validated_url = validate_url(target_url)
+        if not (self.args.no_banner or self.args.quiet):
+            self.print_banner()
         
+        if self.resume_state is not None:
+            validated_url = self.resume_state['start_url']
+            max_depth = self.resume_state['max_depth']
+        else:
+            target_url = self.args.url if self.args.url else input("\n[ 🌐] Enter URL (e.g., https://example.com): ")
+            validated_url = validate_url(target_url)
+            max_depth = self.args.depth
+
+        if not self.args.quiet:
+            self.print_config(validated_url, max_depth)
+        self.scan_target(validated_url, max_depth)
+
+    def print_config(self, validated_url, max_depth):
+        """Muestra la configuración efectiva del escaneo"""
         print("\n[*] Configuración:")
         print(f"  - URL: {validated_url}")
-        print(f"  - Profundidad: {self.args.depth}")
+        print(f"  - Profundidad: {max_depth}")
         print(f"  - Páginas máx/sección: {self.settings['max_pages_per_section']}")
+        print(f"  - Secciones: {self.sections.describe()}")
         print(f"  - Modo rápido: {'Sí' if self.args.fast_scan else 'No'}")
         print(f"  - Verificar SSL: {'No' if self.args.no_verify else 'Sí'}")
-        
-        print("\n[~] Iniciando escaneo...")
+        print(f"  - Motor: {self.settings['engine']} ({self.settings['concurrency']} concurrentes)")
+        print(f"  - Ritmo: {self.rate_limiter.describe()}")
+        print(f"  - Conexiones: {self.describe_pool()}")
+        if self.args.workers or self.args.listen:
+            print(f"  - Distribuido: {self.describe_distributed()}")
+        print(f"  - Extractor: {self.settings['parser']}")
+        print(f"  - Canonicalización: {self.canonicalizer.describe()}")
+        if self.args.sitemaps:
+            print(f"  - Sitemaps: robots.txt, hasta {self.args.sitemap_max_urls} URLs")
+        if self.near_duplicates is not None:
+            print(f"  - Casi duplicadas: SimHash, distancia <= {self.near_duplicates.distance}")
+        if self.args.include or self.args.exclude:
+            print(f"  - Filtros de URL: {len(self.args.include)} de inclusión, {len(self.args.exclude)} de exclusión")
+        if self.parse_pool is not None:
+            print(f"  - Procesos de análisis: {self.args.parse_workers}")
+        if self.persistent_cache is not None:
+            print(f"  - Caché persistente: {self.args.cache_file}")
+        if self.args.bloom_fp:
+            print(f"  - Visitadas en filtro de Bloom: {self.args.bloom_capacity} URLs, FP {self.args.bloom_fp:g}")
+        if self.checkpoint is not None:
+            print(f"  - Punto de control: {self.checkpoint.path} (cada {self.checkpoint.interval:g}s)")
+
+    def scan_target(self, validated_url, max_depth):
+        """
+        Escanea un objetivo ya validado y guarda sus reportes.
+
+        Returns:
+            El ScanReport generado
+        """
+        if self.args.report_format == 'ndjson':
+            path = report_basename(urlparse(validated_url).netloc, self.args.output) + '.ndjson'
+            self.report_writer = StreamingReportWriter(path)
+            if not self.batch:
+                print(f"  - Reporte en streaming: {path}")
+
         self.start_time = time.time()
-        self.scan_site(validated_url, max_depth=self.args.depth)
+        if self.resume_state is not None:
+            print(f"\n[~] Reanudando escaneo desde {self.args.resume}...")
+            self.start_time -= self.restore_checkpoint(self.resume_state)
+        elif self.batch:
+            print(f"\n[~] Iniciando escaneo de {validated_url}...")
+        else:
+            print("\n[~] Iniciando escaneo...")
+        self.scan_site(validated_url, max_depth=max_depth)
         
         report = generate_report(
-            visited=self.visited,
+            start_url=self.crawl_target[0] if self.crawl_target else None,
             valid_links=self.valid_links,
             invalid_links=self.invalid_links,
             errors=self.errors,
             start_time=self.start_time,
-            args=self.args
+            args=self.args,
+            materialize=self.report_writer is None,
+            # En modo lote las métricas son globales y van al resumen agregado
+            metrics=None if self.batch else self.metrics.snapshot()
         )
         
         if self.args.output:
             os.makedirs(self.args.output, exist_ok=True)
         
-        report.save(self.args.output)
+        report.save(
+            self.args.output,
+            fmt=self.args.report_format,
+            writer=self.report_writer,
+            pdf='none' if self.args.no_pdf else self.args.pdf,
+            pdf_background=self.args.pdf_background
+        )
+
+        if self.batch:
+            print(f"\n[+] {report.metadata['target']}: {report.stats['valid_urls']} válidas, "
+                  f"{report.stats['invalid_urls']} inválidas, {report.stats['error_count']} errores "
+                  f"-> {report.filename}")
+            return report
         
         print("\n[+] === Resumen del Escaneo ===")
         print(f"  - URLs válidas encontradas: {report.stats['valid_urls']}")
         print(f"  - URLs inválidas detectadas: {report.stats['invalid_urls']}")
         print(f"  - Errores: {report.stats['error_count']}")
         print(f"  - Duración: {report.metadata['duration_sec']} segundos")
-        print(f"  - Reporte JSON: {report.filename}")
-        pdf_path = report.filename.replace('.json', '.pdf')
-        print(f"  - Reporte PDF:  {pdf_path}")
+        label = 'NDJSON' if self.args.report_format == 'ndjson' else 'JSON'
+        print(f"  - Reporte {label}: {report.filename}")
+        if report.pdf_filename is None:
+            print("  - Reporte PDF:  (desactivado)")
+        elif self.args.pdf == 'full' and self.args.pdf_background:
+            print(f"  - Reporte PDF:  {report.pdf_filename} (generándose en segundo plano)")
+        else:
+            print(f"  - Reporte PDF:  {report.pdf_filename}")
+        if self.args.metrics_file:
+            self.metrics.write_prometheus(self.args.metrics_file)
+            print(f"  - Métricas Prometheus: {self.args.metrics_file}")
+        return report
 
     def scan_site(self, start_url, max_depth=2):
         """Escaneo principal del sitio con BFS optimizado"""
-        queue = [(start_url, 0)]
-        self.visited.add(start_url)
+        if self.args.workers or self.args.listen:
+            from webspectre_scanner.distributed import DistributedCoordinator
+            DistributedCoordinator(self).run(start_url, max_depth)
+            return
+
+        if self.settings['engine'] == 'async':
+            from webspectre_scanner.async_engine import AsyncCrawlEngine
+            AsyncCrawlEngine(self, self.settings['concurrency'], self.shared_loop).run(start_url, max_depth)
+            return
+
+        workers = self.settings['concurrency']
+        queue = self.new_frontier()
+        gate = LevelGate()
+        pages, checks = self.initial_work(start_url, max_depth)
+        for url, depth in pages:
+            queue.push(url, depth)
+            gate.add(depth)
         
-        with ThreadPoolExecutor(max_workers=3) as executor:
+        verifier = LinkVerifier(
+            self.check_url_status,
+            max_workers=self.settings['verify_concurrency'],
+            per_host=self.settings['verify_per_host']
+        )
+        with ThreadPoolExecutor(max_workers=workers) as executor, verifier, queue:
             futures = {}
+            verifier.submit_many(checks)
+            self.pending_work = lambda: (
+                queue.items() + list(futures.values()) + gate.items(),
+                verifier.pending_links()
+            )
+            self.metrics.watch('frontier', lambda: len(queue), owner=self)
+            self.metrics.watch('pages_in_flight', lambda: len(futures), owner=self)
+            self.metrics.watch('verify_pending', lambda: len(verifier.pending_links()), owner=self)
             
-            while queue or futures:
-                while queue and len(futures) < 3:
-                    current_url, depth = queue.pop(0)
+            try:
+                while queue or futures or verifier.busy():
+                    if self.cancel.is_set():
+                        raise KeyboardInterrupt
+                    while queue and len(futures) < workers:
+                        current_url, depth = queue.pop()
+                        futures[executor.submit(self.scan_page, current_url)] = (current_url, depth)
                     
-                    if '/page/' in current_url:
-                        page_num = int(current_url.split('/page/')[1].split('/')[0])
-                        if page_num > self.settings['max_pages_per_section']:
-                            continue
-                    
-                    futures[executor.submit(self.scan_page, current_url)] = (current_url, depth)
-                
-                for future in as_completed(futures):
-                    current_url, depth = futures.pop(future)
-                    new_links = future.result()
-                    
-                    for link in new_links:
-                        if link not in self.visited:
-                            self.visited.add(link)
-                            is_valid, status = self.check_url_status(link)
-                            
-                            if is_valid:
-                                self.valid_links.add(link)
-                                if depth + 1 <= max_depth:
-                                    queue.append((link, depth + 1))
-                            else:
-                                self.invalid_links.add(link)
-                    
-                    time.sleep(random.uniform(1, 3))
+                    done = ()
+                    if futures:
+                        done, _ = wait(
+                            futures,
+                            timeout=0.05 if verifier.busy() else None,
+                            return_when=FIRST_COMPLETED
+                        )
+
+                    for future in done:
+                        current_url, depth = futures.pop(future)
+                        gate.done(current_url, depth, future.result())
+
+                    for current_url, depth, links in gate.ready():
+                        new_pages, to_verify = self.route_links(current_url, links, depth + 1, max_depth)
+                        for link, link_depth in new_pages:
+                            queue.push(link, link_depth)
+                            gate.add(link_depth)
+
+                        verifier.submit_many(to_verify)
+
+                    for link, depth, is_valid, status in verifier.poll(timeout=0 if futures else None):
+                        self.classify(link, is_valid, status)
+
+                    self.maybe_checkpoint()
+                    self.stats_ticker.tick()
+            except KeyboardInterrupt:
+                self.save_checkpoint()
+                raise
+            finally:
+                self.pending_work = None
+                self.metrics.unwatch('frontier', 'pages_in_flight', 'verify_pending', owner=self)
+
+    def initial_work(self, start_url, max_depth):
+        """
+        Trabajo inicial del rastreo: la URL de inicio o lo pendiente en el punto de control.
+
+        Returns:
+            Tupla (páginas a rastrear, enlaces a verificar) como listas de (url, depth)
+        """
+        self.crawl_target = (start_url, max_depth)
+        if self.resume_state is not None:
+            state, self.resume_state = self.resume_state, None
+            return ([tuple(item) for item in state['pages']],
+                    [tuple(item) for item in state['checks']])
+
+        start_url = self.url_filter.canonicalize(start_url)
+        self.crawl_target = (start_url, max_depth)
+        self.visited.add(start_url)
+        pages, checks = [(start_url, 0)], []
+        if self.args.sitemaps:
+            seeded_pages, checks = self.seed_from_sitemaps(start_url, max_depth)
+            pages += seeded_pages
+        return pages, checks
+
+    def seed_from_sitemaps(self, start_url, max_depth):
+        """
+        Siembra el rastreo con las URLs de los sitemaps del sitio, como si la
+        página de inicio enlazara a todas ellas.
+
+        Returns:
+            Tupla (páginas a rastrear, enlaces a verificar) como listas de (url, depth)
+        """
+        print("\n[~] Leyendo robots.txt y sitemaps...", flush=True)
+        entries = SitemapSeeder(self, self.args.sitemap_max_urls).seed(start_url)
+        pages, checks = [], []
+        for url, lastmod in entries:
+            if lastmod is not None and self.persistent_cache is not None:
+                self.sitemap_lastmod[url] = lastmod
+            route = self.route_link(url, 1, max_depth)
+            if route == 'page':
+                pages.append((url, 1))
+            elif route == 'check':
+                checks.append((url, 1))
+
+        self.metrics.inc('sitemap_urls', len(entries))
+        print(f"[+] Sitemaps: {len(entries)} URLs ({len(pages)} a rastrear, {len(checks)} a verificar)", flush=True)
+        return pages, checks
+
+    def maybe_checkpoint(self):
+        """Guarda un punto de control si ha pasado el intervalo configurado"""
+        if self.checkpoint is not None and self.checkpoint.due():
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        """Guarda el estado completo del rastreo en curso"""
+        if self.checkpoint is None or self.pending_work is None:
+            return
+
+        pages, checks = self.pending_work()
+        start_url, max_depth = self.crawl_target
+        self.checkpoint.save({
+            'start_url': start_url,
+            'max_depth': max_depth,
+            'elapsed': time.time() - self.start_time,
+            'visited': self.visited.dump(),
+            'leaf_links': list(self.leaf_links),
+            'valid_links': list(self.valid_links),
+            'invalid_links': list(self.invalid_links),
+            'errors': list(self.errors),
+            'url_status_cache': [
+                [url, is_valid, status]
+                for url, (is_valid, status) in list(self.url_status_cache.items())
+            ],
+            'near_duplicates': self.near_duplicates.dump() if self.near_duplicates is not None else [],
+            'sections': self.sections.dump(),
+            'pages': pages,
+            'checks': checks
+        })
+
+    def restore_checkpoint(self, state):
+        """
+        Restaura los resultados guardados en un punto de control.
+
+        Returns:
+            Segundos de escaneo ya transcurridos antes de la interrupción
+        """
+        self.visited.load(state['visited'])
+        self.leaf_links.update(state['leaf_links'])
+        self.valid_links.update(state['valid_links'])
+        self.invalid_links.update(state['invalid_links'])
+        self.errors.extend(state['errors'])
+        for url, is_valid, status in state['url_status_cache']:
+            self.url_status_cache[url] = (is_valid, status)
+        if self.near_duplicates is not None:
+            self.near_duplicates.load(state.get('near_duplicates', []))
+        self.sections.load(state.get('sections', {}))
+
+        if self.report_writer is not None:
+            for url in self.valid_links:
+                self.report_writer.write_url(url, True, self.url_status_cache.get(url, (True, 0))[1])
+            for url in self.invalid_links:
+                self.report_writer.write_url(url, False, self.url_status_cache.get(url, (False, 0))[1])
+            for message in self.errors:
+                self.report_writer.write_error(message)
+        return state['elapsed']
+
+    def route_links(self, url, links, depth, max_depth):
+        """
+        Decide qué hacer con los enlaces de una página y registra cuántos
+        aportó al presupuesto de su sección.
+
+        Returns:
+            Tupla (páginas a rastrear, enlaces a verificar) como listas de (url, depth)
+        """
+        pages, checks = [], []
+        for link in links:
+            route = self.route_link(link, depth, max_depth)
+            if route == 'page':
+                pages.append((link, depth))
+            elif route == 'check':
+                checks.append((link, depth))
+
+        exhausted = self.sections.record(url, len(pages) + len(checks))
+        if exhausted is not None:
+            print(f"\n[-] Sección agotada (sin enlaces nuevos): {exhausted}", flush=True)
+        return pages, checks
+
+    def route_link(self, link, depth, max_depth):
+        """
+        Decide qué hacer con un enlace descubierto a cierta profundidad.
+
+        Returns:
+            'page' si hay que descargarlo y analizarlo (se valida con su propio GET),
+            'check' si solo hay que verificarlo con HEAD, o None si ya se procesó
+        """
+        if link in self.visited and link not in self.leaf_links:
+            return None
+
+        # Reclamar la URL es atómico y la marca como hoja en el mismo paso, así
+        # is_new_link nunca la ve visitada sin saber aún si solo se verificará
+        claimed = self.url_store.claim(link, leaf=True)
+        refusal = 'depth' if depth > max_depth else self.sections.refusal(link)
+        if refusal is not None:
+            if claimed and refusal != 'depth':
+                self.sections.reject(refusal)
+            return 'check' if claimed else None
+
+        # Con peticiones concurrentes un enlace puede aparecer antes a más
+        # profundidad; si luego aparece a una rastreable, se promociona. Solo
+        # quien quita la marca de hoja (discard devuelve True a un llamante)
+        # descuenta la URL del presupuesto de su sección
+        if not self.leaf_links.discard(link):
+            return 'check' if claimed else None
+        if self.sections.admit(link):
+            return 'page'
+        self.leaf_links.add(link)
+        return 'check' if claimed else None
+
+    def new_frontier(self):
+        """Crea la frontera de URLs pendientes según la configuración"""
+        return Frontier(
+            max_memory=self.settings['frontier_max'],
+            spill_dir=self.settings['frontier_spill_dir']
+        )
 
     def scan_page(self, url):
-        """Escanea una página individual en busca de enlaces"""
+        """Escanea una página individual en busca de enlaces con una sola petición"""
+        cached = self.url_status_cache.get(url)
+        if cached is not None and not cached[0]:
+            self.classify(url, False, cached[1])
+            return []
+
+        if self.reuse_cached_page(url):
+            return []
+
         try:
-            is_valid, status = self.check_url_status(url)
-            if not is_valid:
-                self.invalid_links.add(url)
-                return []
+            page = self.unchanged_page(url) or self.fetch_page(url)
+        except Exception as e:
+            self.fetch_failed(url, e)
+            return []
 
-            self.valid_links.add(url)
-            print(f"\n[+] Escaneando: {url}", flush=True)
+        return self.process_page(page)
 
-            response = self.session.get(url, timeout=15)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            found_links = []
-            
-            tags_map = {
-                'a': ['href'],
-                'link': ['href'],
-                'script': ['src'],
-                'iframe': ['src']
-            }
-            
-            for tag, attrs in tags_map.items():
-                for element in soup.find_all(tag):
-                    for attr in attrs:
-                        if element.has_attr(attr):
-                            new_url = self.process_link(url, element[attr])
-                            if new_url:
-                                found_links.append(new_url)
-            
-            return found_links
+    def fetch_page(self, url):
+        """
+        Descarga una página en streaming registrando estado, tipo de contenido y cuerpo.
+
+        Las cabeceras deciden si se lee el cuerpo: los errores, los tipos que no
+        se analizan y los cuerpos que declaran más de max_body_size bytes se
+        cierran sin descargarlos. Con inline_parse los enlaces se extraen
+        mientras llega el cuerpo y se devuelven en `links`, sin el cuerpo.
+        """
+        headers, entry = self.conditional_headers(url)
+        response = self.request('GET', url, timeout=15, headers=headers, stream=True)
+        self.metrics.inc('pages')
+        try:
+            if response.status_code == 304 and entry is not None:
+                return self.not_modified_page(url, entry)
+
+            page = FetchResult(
+                url=url,
+                status=response.status_code,
+                content_type=response.headers.get('Content-Type', ''),
+                body=b'',
+                encoding=response.encoding or '',
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+            if self.skip_body(page, response.headers.get('Content-Length')):
+                return page
+            return self.read_page(page, response)
+        finally:
+            response.close()
+
+    def skip_body(self, page, content_length):
+        """
+        Indica, solo con las cabeceras, si el cuerpo de una página no merece
+        descargarse, y lo registra en las métricas.
+        """
+        limit = self.settings['max_body_size']
+        if page.status >= 400:
+            reason = 'error'
+        elif not self.is_parseable(page):
+            reason = 'type'
+        elif limit and content_length and content_length.isdigit() and int(content_length) > limit:
+            reason = 'size'
+            print(f"\n[!] Cuerpo de {content_length} bytes (máx. {limit}), no se analiza: {page.url}", flush=True)
+        else:
+            return False
+        self.metrics.inc('body_skipped', reason=reason)
+        return True
+
+    def read_page(self, page, response):
+        """Lee el cuerpo de una página hasta max_body_size bytes, analizándolo por el camino si se puede"""
+        parser = None
+        if self.inline_parse and page.encoding:
+            parser = IncrementalPageParser(page.url, page.encoding, self.settings['parser'], self.url_filter)
+        chunks = []
+        size = 0
+        started = time.perf_counter()
+        for chunk in iter_body(response, BODY_CHUNK_SIZE):
+            chunk, truncated = self.clip_chunk(page.url, size, chunk)
+            size += len(chunk)
+            if parser is not None:
+                parser.feed(chunk)
+            else:
+                chunks.append(chunk)
+            if truncated:
+                break
+
+        elapsed = time.perf_counter() - started
+        self.metrics.inc('http_bytes', size)
+        if parser is not None:
+            self.metrics.observe('download_seconds', elapsed - parser.parse_seconds)
+            return page._replace(links=self.record_parse(*parser.close()))
+
+        self.metrics.observe('download_seconds', elapsed)
+        body = b''.join(chunks)
+        return page._replace(body=body, encoding=page.encoding or guess_encoding(body))
 
+    def clip_chunk(self, url, size, chunk):
+        """
+        Recorta un trozo del cuerpo para no pasar de max_body_size bytes. Sin
+        Content-Length el tamaño solo se conoce leyendo: se analiza lo recibido
+        hasta el límite y se corta la descarga.
+
+        Returns:
+            Tupla (trozo, True si se alcanzó el límite)
+        """
+        limit = self.settings['max_body_size']
+        if not limit or size + len(chunk) <= limit:
+            return chunk, False
+        self.metrics.inc('body_skipped', reason='truncated')
+        print(f"\n[!] Cuerpo truncado a {limit} bytes: {url}", flush=True)
+        return chunk[:limit - size], True
+
+    def conditional_headers(self, url):
+        """
+        Cabeceras condicionales para revisitar una página ya analizada.
+
+        Returns:
+            Tupla (cabeceras, entrada de la caché persistente o None)
+        """
+        if self.persistent_cache is None:
+            return {}, None
+
+        entry = self.persistent_cache.get(url)
+        if entry is None or entry.links is None:
+            return {}, None
+
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers, (entry if headers else None)
+
+    def reuse_cached_page(self, url):
+        """
+        Clasifica sin petición una página vigente en la caché persistente que se
+        descargó con error o sin contenido HTML. Las páginas HTML se revisitan
+        siempre con cabeceras condicionales, aunque no aportaran enlaces.
+
+        Returns:
+            True si la página quedó clasificada y no hay que descargarla
+        """
+        if self.persistent_cache is None:
+            return False
+
+        entry = self.persistent_cache.get(url)
+        if entry is None or entry.links != [] or not (entry.status >= 400 or entry.html is False):
+            return False
+
+        is_valid = 0 < entry.status < 400
+        self.url_status_cache[url] = (is_valid, entry.status)
+        self.classify(url, is_valid, entry.status)
+        return True
+
+    def unchanged_page(self, url):
+        """
+        Página ya analizada que el sitemap declara sin cambios desde entonces:
+        se reconstruye de la caché persistente sin ninguna petición.
+
+        Returns:
+            El FetchResult con los enlaces guardados, o None si hay que descargarla
+        """
+        lastmod = self.sitemap_lastmod.get(url)
+        if lastmod is None:
+            return None
+
+        entry = self.persistent_cache.get(url)
+        if entry is None or entry.links is None or lastmod > entry.fetched_at:
+            return None
+        self.metrics.inc('sitemap_unchanged')
+        return self.not_modified_page(url, entry)
+
+    def not_modified_page(self, url, entry):
+        """Reconstruye una página que respondió 304 a partir de la caché persistente"""
+        return FetchResult(
+            url=url,
+            status=entry.status,
+            content_type='',
+            body=b'',
+            encoding='',
+            etag=entry.etag,
+            last_modified=entry.last_modified,
+            links=entry.links
+        )
+
+    def process_page(self, page):
+        """Clasifica una página descargada y extrae sus enlaces si es HTML"""
+        if not self.classify_page(page):
+            return []
+
+        try:
+            return self.parse_page(page)
         except Exception as e:
-            error_msg = f"\n[!] Error en {url}: {str(e)}"
-            print(error_msg, flush=True)
-            self.errors.append(error_msg)
+            self.report_page_error(page.url, e)
             return []
 
+    def classify_page(self, page):
+        """Registra el estado de una página y devuelve si hay que analizarla"""
+        is_valid = page.status < 400
+        self.url_status_cache[page.url] = (is_valid, page.status)
+        self.classify(page.url, is_valid, page.status)
+        if not is_valid:
+            self.remember(page, [])
+            return False
+
+        if not self.args.quiet:
+            print(f"\n[+] Escaneando: {page.url}", flush=True)
+
+        if not self.is_parseable(page):
+            self.remember(page, [])
+            return False
+        return True
+
+    @staticmethod
+    def is_parseable(page):
+        """Indica si merece la pena extraer enlaces de una página según su tipo de contenido"""
+        if page.links is not None:
+            return True
+        content_type = page.content_type.split(';')[0].strip().lower()
+        return not content_type or content_type in PARSEABLE_TYPES
+
+    def parse_page(self, page):
+        """Extrae los enlaces de una página, en el pool de procesos si está activo"""
+        if page.links is not None:
+            self.remember(page, page.links)
+            return self.filter_unvisited(page.links)
+
+        if self.is_near_duplicate(page.url, self.fingerprint(page)):
+            self.remember(page, [])
+            return []
+
+        links = self.extract_links(page)
+        self.remember(page, links)
+        return self.filter_unvisited(links)
+
+    def extract_links(self, page):
+        """Analiza una página descargada, en el pool de procesos si está activo, y devuelve todos sus enlaces"""
+        if self.parse_pool is None:
+            result = parse_and_normalize_timed(*self.parse_job(page))
+        else:
+            result = self.parse_pool.submit(parse_and_normalize_timed, *self.parse_job(page)).result()
+        return self.record_parse(*result)
+
+    def fingerprint(self, page):
+        """Huella SimHash del cuerpo de una página, o None si la detección está desactivada"""
+        if self.near_duplicates is None or not page.body:
+            return None
+        return simhash(page.body, page.encoding)
+
+    def is_near_duplicate(self, url, fingerprint):
+        """
+        Registra la huella de una página e indica si es casi idéntica a otra ya
+        rastreada, en cuyo caso sus enlaces no se siguen.
+        """
+        if fingerprint is None:
+            return False
+        original = self.near_duplicates.add(url, fingerprint)
+        if original is None:
+            return False
+        self.metrics.inc('near_duplicates')
+        print(f"\n[=] Casi duplicada de {original}: {url}", flush=True)
+        return True
+
+    def record_parse(self, links, parse_seconds, normalize_seconds):
+        """Registra los tiempos de análisis y normalización de una página y devuelve sus enlaces"""
+        self.metrics.observe('parse_seconds', parse_seconds)
+        self.metrics.observe('normalize_seconds', normalize_seconds)
+        return links
+
+    def remember(self, page, links):
+        """Guarda el resultado de una página descargada en la caché persistente, si está activa"""
+        if self.persistent_cache is not None:
+            self.persistent_cache.put(
+                page.url, page.status, page.etag, page.last_modified, links,
+                html=page.status < 400 and self.is_parseable(page)
+            )
+
+    def parse_job(self, page):
+        """Argumentos de parse_and_normalize_timed para analizar una página en otro proceso"""
+        return (page.url, page.body, page.encoding, self.settings['parser'], self.url_filter)
+
+    def filter_unvisited(self, links):
+        """Descarta los enlaces ya visitados"""
+        return [link for link in links if self.is_new_link(link)]
+
+    def is_new_link(self, url):
+        """Indica si un enlace aún puede planificarse (no visitado o solo verificado)"""
+        return self.url_store.is_new(url)
+
+    def classify(self, url, is_valid, status):
+        """Registra una URL como válida o inválida y la emite al reporte en streaming"""
+        links = self.valid_links if is_valid else self.invalid_links
+        if links.add(url) and self.report_writer is not None:
+            self.report_writer.write_url(url, is_valid, status)
+
+    def fetch_failed(self, url, error):
+        """Registra una página cuya descarga falló"""
+        self.url_status_cache[url] = (False, 0)
+        self.classify(url, False, 0)
+        self.report_page_error(url, error)
+
+    def report_page_error(self, url, error):
+        """Registra un error producido al escanear una página"""
+        error_msg = f"\n[!] Error en {url}: {str(error)}"
+        print(error_msg, flush=True)
+        self.record_error(error_msg)
+
+    def record_error(self, message):
+        """Añade un error a la lista y al reporte en streaming"""
+        # Mismo orden en la lista y en el reporte en streaming
+        with self.errors_lock:
+            self.errors.append(message)
+            if self.report_writer is not None:
+                self.report_writer.write_error(message)
+
     def process_link(self, base_url, link):
         """Procesa y normaliza un enlace encontrado"""
-        if not link or is_excluded_url(link, self.settings['exclude_paths']):
-            return None
-            
-        new_url = urljoin(base_url, link)
-        parsed = urlparse(new_url)
-        new_url = parsed._replace(query="", fragment="").geturl()
-        
-        if parsed.netloc == urlparse(base_url).netloc and new_url not in self.visited:
+        new_url = self.url_filter.normalize(base_url, link)
+        if new_url and self.is_new_link(new_url):
             return new_url
         return None
 
+    def request(self, method, url, **kwargs):
+        """Realiza una petición respetando el límite de ritmo del host"""
+        self.rate_limiter.acquire(url)
+        response = self.session.request(method, url, verify=self.settings['verify_ssl'], **kwargs)
+        self.rate_limiter.feedback(url, response.status_code, response.headers.get('Retry-After'))
+        return response
+
+    def cached_status(self, url):
+        """Estado vigente de una URL en la caché persistente, como (is_valid, status)"""
+        if self.persistent_cache is None:
+            return None
+
+        entry = self.persistent_cache.get(url)
+        if entry is None:
+            return None
+
+        result = (0 < entry.status < 400, entry.status)
+        self.url_status_cache[url] = result
+        return result
+
     def check_url_status(self, url):
-        """Verifica el estado de una URL con caching"""
+        """Verifica con HEAD el estado de una URL que no se va a rastrear"""
         if url in self.url_status_cache:
+            self.metrics.inc('status_cache', result='hit')
             return self.url_status_cache[url]
-        
-        if self.settings['trust_categories'] and ('/category/' in url or '/page/' in url):
+
+        cached = self.cached_status(url)
+        if cached is not None:
+            self.metrics.inc('status_cache', result='persistent')
+            return cached
+
+        self.metrics.inc('status_cache', result='miss')
+        if self.sections.trusted(url):
+            self.metrics.inc('section_trusted')
             return (True, 200)
             
         try:
-            response = self.session.head(
-                url, 
-                timeout=10,
-                allow_redirects=True,
-                verify=self.settings['verify_ssl']
-            )
+            response = self.request('HEAD', url, timeout=10, allow_redirects=True)
             is_valid = response.status_code < 400
             self.url_status_cache[url] = (is_valid, response.status_code)
+            self.sections.observe(url, is_valid)
+            if self.persistent_cache is not None:
+                self.persistent_cache.put(
+                    url, response.status_code,
+                    response.headers.get('ETag'), response.headers.get('Last-Modified')
+                )
             return (is_valid, response.status_code)
         except Exception as e:
             print(f"\n[!] Error al verificar {url}: {str(e)}", flush=True)
@@ -269,29 +1014,55 @@ class WebSpectreScanner:
             return (False, 0)
 
     def handle_interrupt(self):
-        """Maneja la interrupción por teclado"""
+        """
+        Maneja la interrupción por teclado.
+
+        Returns:
+            Tupla (reporte parcial, ruta del JSON parcial)
+        """
         print("\n[!] Escaneo interrumpido. Generando reporte parcial...")
         report = generate_report(
-            visited=self.visited,
+            start_url=self.crawl_target[0] if self.crawl_target else None,
             valid_links=self.valid_links,
             invalid_links=self.invalid_links,
             errors=self.errors,
-            start_time=self.start_time,
-            args=self.args
+            start_time=self.start_time or time.time(),
+            args=self.args,
+            metrics=None if self.batch else self.metrics.snapshot()
         )
         partial_name = f"partial_scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        if self.batch:
+            partial_name = f"partial_scan_{report.metadata['target']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         if self.args.output:
+            os.makedirs(self.args.output, exist_ok=True)
             partial_name = os.path.join(self.args.output, partial_name)
         with open(partial_name, 'w') as f:
             json.dump(report.to_dict(), f, indent=2)
         print(f"\n[!] Reporte parcial guardado como: {partial_name}")
+        if self.report_writer is not None:
+            self.report_writer.write_summary(report.metadata, report.stats, partial=True, metrics=report.metrics)
+            print(f"[!] Reporte en streaming cerrado: {self.report_writer.path}")
+        if self.args.metrics_file and not self.batch:
+            self.metrics.write_prometheus(self.args.metrics_file)
+        if self.checkpoint is not None and os.path.exists(self.checkpoint.path):
+            print(f"[!] Reanudar con: --resume {self.checkpoint.path}")
+        return report, partial_name
 
     def handle_error(self, error):
         """Maneja errores durante el escaneo"""
         print(f"\n[!] Error crítico: {str(error)}")
-        self.errors.append(str(error))
+        self.record_error(str(error))
 
     def cleanup(self):
         """Limpia recursos y cierra la sesión"""
+        if self.batch:
+            # Los recursos compartidos los cierra el escáner que los creó
+            return
         self.session.close()
+        if self.shared_loop is not None:
+            self.shared_loop.close()
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown(cancel_futures=True)
+        if self.persistent_cache is not None:
+            self.persistent_cache.close()
         print("\n[+] Limpieza completada. Sesión cerrada.")
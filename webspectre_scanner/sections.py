@@ -0,0 +1,241 @@
+"""
+Presupuesto de rastreo por sección: paginación, plantillas de URL y
+secciones que dejan de aportar enlaces nuevos
+"""
+
+import re
+import threading
+from collections import Counter
+from urllib.parse import parse_qsl, urlsplit
+
+from webspectre_scanner.frontier import section_of
+
+# Segmentos de ruta seguidos del número de página (/page/3, /pagina/3)
+PAGE_SEGMENTS = frozenset({'page', 'pages', 'pagina', 'pag', 'pg', 'paged'})
+
+# Parámetros de query con el número de página (?page=3); solo llegan aquí
+# si se conservan con --keep-params
+PAGE_PARAMS = frozenset({'page', 'p', 'pg', 'paged', 'pagina', 'offset', 'start'})
+
+# Un solo segmento con el número de página (page-3, page3, pagina_3)
+PAGE_SLUG = re.compile(r'(?:page|pagina|pag|pg)[-_]?(\d+)', re.IGNORECASE)
+
+# Identificadores opacos: hexadecimales largos o UUID
+OPAQUE_ID = re.compile(r'[0-9a-f]{12,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+# Marcadores de las plantillas de archivos por fecha
+DATE_SEGMENTS = frozenset({'{yyyy}', '{mm}', '{dd}'})
+
+
+def page_number(url: str):
+    """Número de página de una URL paginada, o None si no lo parece"""
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    for index, segment in enumerate(segments):
+        lowered = segment.lower()
+        if lowered in PAGE_SEGMENTS and index + 1 < len(segments) and segments[index + 1].isdigit():
+            return int(segments[index + 1])
+        match = PAGE_SLUG.fullmatch(segment)
+        if match:
+            return int(match.group(1))
+    for name, value in parse_qsl(parts.query):
+        if name.lower() in PAGE_PARAMS and value.isdigit():
+            return int(value)
+    return None
+
+
+def url_template(url: str) -> str:
+    """
+    Plantilla de una URL: host y ruta con los segmentos variables sustituidos.
+
+    Los números pasan a {n} (o {yyyy}/{mm}/{dd} en archivos por fecha), los
+    identificadores opacos a {id} y la página a {page}; de la query solo se
+    conservan los nombres. /blog/2024/05/ y /blog/2023/11/ comparten plantilla
+    (/blog/{yyyy}/{mm}/), mientras que cada artículo con su slug tiene la suya.
+    """
+    parts = urlsplit(url)
+    segments = parts.path.split('/')
+    template = []
+    after_year = 0
+    after_page = False
+    for segment in segments:
+        if after_page and segment.isdigit():
+            template.append('{page}')
+        elif segment.isdigit():
+            if len(segment) == 4 and segment[:2] in ('19', '20'):
+                template.append('{yyyy}')
+                after_year = 1
+                continue
+            if after_year and len(segment) <= 2:
+                template.append('{mm}' if after_year == 1 else '{dd}')
+                after_year += 1
+                continue
+            template.append('{n}')
+        elif OPAQUE_ID.fullmatch(segment.lower()):
+            template.append('{id}')
+        elif PAGE_SLUG.fullmatch(segment):
+            template.append('{page}')
+        else:
+            template.append(segment)
+        after_year = 0
+        after_page = segment.lower() in PAGE_SEGMENTS
+    path = '/'.join(template)
+    names = sorted({name for name, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return parts.netloc + path + (f"?{'&'.join(names)}" if names else '')
+
+
+def is_archive(template: str) -> bool:
+    """
+    Indica si una plantilla corresponde a un listado generado: paginación
+    (en la ruta o en la query) o archivo por fecha (/{yyyy}/{mm}/).
+    """
+    path, _, query = template.partition('?')
+    segments = [segment for segment in path.split('/')[1:] if segment]
+    if '{page}' in segments or PAGE_PARAMS.intersection(query.split('&')):
+        return True
+    return bool(segments) and segments[-1] in DATE_SEGMENTS
+
+
+class SectionBudget:
+    """
+    Decide qué URLs de cada sección merece la pena descargar.
+
+    - Paginación: las páginas por encima de `max_pages` no se rastrean (solo
+      se verifican), se detecten por /page/N, page-N o ?page=N.
+    - Listados generados (paginación y archivos por fecha) admiten como mucho
+      `max_pages` URLs por plantilla; el resto de plantillas, `budget` (0 sin
+      límite).
+    - Con `patience` > 0, una plantilla cuyas últimas `patience` páginas no
+      aportaron ningún enlace nuevo se da por agotada y no admite más.
+    - Los enlaces que solo se verifican se dan por válidos sin petición en las
+      secciones con `trust_after` verificaciones válidas y ninguna inválida
+      (0, lo predeterminado, para verificar siempre). Es opcional porque un
+      enlace roto en una sección de confianza se daría por válido.
+
+    Es segura entre hilos.
+    """
+
+    def __init__(self, max_pages=20, budget=0, patience=0, trust_after=0, metrics=None):
+        self.max_pages = max_pages
+        self.budget = budget
+        self.patience = patience
+        self.trust_after = trust_after
+        self.lock = threading.Lock()
+        self.admitted = Counter()
+        self.dry_streak = Counter()
+        self.exhausted = set()
+        # Sección -> [verificaciones válidas, inválidas]
+        self.verified = {}
+        self.metrics = metrics
+
+    def describe(self):
+        """Resumen legible de los límites activos"""
+        parts = [f"{self.max_pages} páginas por listado"]
+        if self.budget:
+            parts.append(f"{self.budget} URLs por plantilla")
+        if self.patience:
+            parts.append(f"agotada tras {self.patience} páginas sin enlaces nuevos")
+        parts.append(f"confiar tras {self.trust_after} válidas" if self.trust_after else "verificar siempre")
+        return ', '.join(parts)
+
+    def refusal(self, url: str):
+        """
+        Motivo por el que una URL no se descargaría ('pagination', 'exhausted'
+        o 'budget'), o None si cabe. No descuenta nada ni lo registra.
+        """
+        number = page_number(url)
+        if number is not None and number > self.max_pages:
+            return 'pagination'
+        template = url_template(url)
+        with self.lock:
+            return self._refusal(template)
+
+    def admit(self, url: str) -> bool:
+        """
+        Descuenta del presupuesto de su plantilla una URL ya reclamada para
+        descargarla. Si ya no cabe, registra el motivo y devuelve False.
+        """
+        number = page_number(url)
+        if number is not None and number > self.max_pages:
+            return self.reject('pagination')
+
+        template = url_template(url)
+        with self.lock:
+            reason = self._refusal(template)
+            if reason is None:
+                self.admitted[template] += 1
+                return True
+        return self.reject(reason)
+
+    def _refusal(self, template):
+        # Con el cerrojo tomado
+        if template in self.exhausted:
+            return 'exhausted'
+        limit = self.max_pages if is_archive(template) else self.budget
+        if limit and self.admitted[template] >= limit:
+            return 'budget'
+        return None
+
+    def reject(self, reason):
+        """Registra una URL reclamada que no se descargará por el motivo dado"""
+        if self.metrics is not None:
+            self.metrics.inc('section_skipped', reason=reason)
+        return False
+
+    def record(self, url: str, new_links: int):
+        """
+        Registra cuántos enlaces nuevos aportó una página descargada.
+
+        Returns:
+            La plantilla si con esta página se dio por agotada, o None
+        """
+        if not self.patience:
+            return None
+        template = url_template(url)
+        with self.lock:
+            if new_links:
+                self.dry_streak[template] = 0
+                return None
+            self.dry_streak[template] += 1
+            if self.dry_streak[template] >= self.patience and template not in self.exhausted:
+                self.exhausted.add(template)
+                return template
+        return None
+
+    def trusted(self, url: str) -> bool:
+        """Indica si un enlace puede darse por válido sin verificarlo"""
+        if not self.trust_after:
+            return False
+        key = self._section_key(url)
+        with self.lock:
+            valid, invalid = self.verified.get(key, (0, 0))
+        return valid >= self.trust_after and not invalid
+
+    def observe(self, url: str, is_valid: bool):
+        """Registra el resultado de una verificación real"""
+        key = self._section_key(url)
+        with self.lock:
+            counts = self.verified.setdefault(key, [0, 0])
+            counts[0 if is_valid else 1] += 1
+
+    @staticmethod
+    def _section_key(url):
+        return f"{urlsplit(url).netloc}/{section_of(url)}"
+
+    def dump(self) -> dict:
+        """Estado serializable para los puntos de control"""
+        with self.lock:
+            return {
+                'admitted': dict(self.admitted),
+                'dry_streak': dict(self.dry_streak),
+                'exhausted': sorted(self.exhausted),
+                'verified': {key: list(counts) for key, counts in self.verified.items()},
+            }
+
+    def load(self, state: dict):
+        with self.lock:
+            self.admitted.update(state.get('admitted', {}))
+            self.dry_streak.update(state.get('dry_streak', {}))
+            self.exhausted.update(state.get('exhausted', []))
+            for key, counts in state.get('verified', {}).items():
+                self.verified[key] = list(counts)
@@ -0,0 +1,98 @@
+"""
+Huellas SimHash para detectar páginas casi duplicadas
+"""
+
+import hashlib
+import re
+import threading
+
+FINGERPRINT_BITS = 64
+
+TOKEN = re.compile(r'\w+')
+
+
+def simhash(body: bytes, encoding: str = 'utf-8', shingle: int = 3, max_features: int = 4096) -> int:
+    """
+    Huella SimHash de 64 bits de un documento.
+
+    Las características son los grupos distintos de `shingle` palabras
+    consecutivas (marcado incluido, en minúsculas), sin pesos: un texto de
+    relleno repetido cuenta una sola vez, así que dos páginas de la misma
+    plantilla solo se parecen si también comparten casi todo lo demás. El
+    hash de cada característica es estable entre procesos.
+    """
+    tokens = TOKEN.findall(body.decode(encoding or 'utf-8', errors='replace').lower())
+    if len(tokens) < shingle:
+        tokens += [''] * (shingle - len(tokens))
+    features = set(map(' '.join, zip(*(tokens[i:] for i in range(shingle)))))
+    if len(features) > max_features:
+        # Muestra determinista: las primeras en orden lexicográfico
+        features = sorted(features)[:max_features]
+
+    bits = [
+        format(int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+        for feature in features
+    ]
+    # Cada columna cuenta en cuántas características está activo ese bit
+    half = len(bits) / 2
+    fingerprint = 0
+    for column in zip(*bits):
+        fingerprint = (fingerprint << 1) | (column.count('1') > half)
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """
+    Índice de huellas SimHash que encuentra una huella a distancia de Hamming
+    <= `distance` de alguna ya vista.
+
+    Por el principio del palomar, si dos huellas difieren en como mucho k bits,
+    al partirlas en k + 1 bloques al menos uno coincide exactamente: cada
+    bloque indexa las huellas por su valor y solo se comparan las candidatas.
+    """
+
+    def __init__(self, distance: int = 3):
+        self.distance = max(0, distance)
+        blocks = min(self.distance + 1, FINGERPRINT_BITS)
+        width = FINGERPRINT_BITS // blocks
+        self.blocks = [
+            (start, width if index < blocks - 1 else FINGERPRINT_BITS - start)
+            for index, start in enumerate(range(0, width * blocks, width))
+        ]
+        self.tables = [{} for _ in self.blocks]
+        self.urls = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.urls)
+
+    def _keys(self, fingerprint):
+        return [(fingerprint >> start) & ((1 << width) - 1) for start, width in self.blocks]
+
+    def add(self, url: str, fingerprint: int):
+        """
+        Registra la huella de una página.
+
+        Returns:
+            La URL de una página ya vista casi idéntica (que no se registra), o None
+        """
+        keys = self._keys(fingerprint)
+        with self.lock:
+            for table, key in zip(self.tables, keys):
+                for candidate in table.get(key, ()):
+                    if (candidate ^ fingerprint).bit_count() <= self.distance:
+                        return self.urls[candidate]
+            if fingerprint not in self.urls:
+                self.urls[fingerprint] = url
+                for table, key in zip(self.tables, keys):
+                    table.setdefault(key, []).append(fingerprint)
+        return None
+
+    def dump(self):
+        """Lista [url, huella] serializable para los puntos de control"""
+        with self.lock:
+            return [[url, fingerprint] for fingerprint, url in self.urls.items()]
+
+    def load(self, entries):
+        for url, fingerprint in entries:
+            self.add(url, fingerprint)
@@ -0,0 +1,186 @@
+"""
+Semillas del rastreo a partir de robots.txt y de los sitemaps XML
+"""
+
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlsplit
+from xml.etree.ElementTree import XMLPullParser
+
+from webspectre_scanner.transport import iter_body
+
+# Trozos en los que se lee y analiza cada sitemap
+CHUNK_SIZE = 64 * 1024
+
+# Límite de sitemaps descargados (índices incluidos) por escaneo
+MAX_SITEMAPS = 1000
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def parse_robots(text: str, base_url: str) -> list:
+    """URLs absolutas de las líneas 'Sitemap:' de un robots.txt"""
+    sitemaps = []
+    for line in text.splitlines():
+        name, sep, value = line.partition(':')
+        value = value.split('#', 1)[0].strip()
+        if sep and name.strip().lower() == 'sitemap' and value:
+            sitemaps.append(urljoin(base_url, value))
+    return sitemaps
+
+
+def parse_lastmod(value: str):
+    """Marca de tiempo de un <lastmod> (fecha W3C), o None si no es válido"""
+    try:
+        moment = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def iter_sitemap(chunks):
+    """
+    Analiza un sitemap o un índice de sitemaps por trozos, sin cargarlo entero.
+
+    Los sitemaps comprimidos (.xml.gz) se detectan por su cabecera gzip. Cada
+    <url> o <sitemap> se descarta del árbol en cuanto se ha leído, así que la
+    memoria no crece con el número de entradas.
+
+    Args:
+        chunks: Iterable de trozos de bytes del cuerpo de la respuesta
+
+    Yields:
+        Tuplas (tipo, loc, lastmod) con tipo 'url' o 'sitemap' y lastmod como
+        marca de tiempo o None
+
+    Raises:
+        ParseError: Si el documento no es XML válido
+    """
+    parser = XMLPullParser(events=('start', 'end'))
+    root = None
+    entry = {}
+    for chunk in _inflate(chunks):
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            tag = element.tag.rpartition('}')[2]
+            if event == 'start':
+                if root is None:
+                    root = element
+                continue
+            if tag in ('loc', 'lastmod'):
+                entry[tag] = (element.text or '').strip()
+            elif tag in ('url', 'sitemap'):
+                if entry.get('loc'):
+                    lastmod = entry.get('lastmod')
+                    yield tag, entry['loc'], parse_lastmod(lastmod) if lastmod else None
+                entry = {}
+                root.clear()
+    parser.close()
+
+
+def _inflate(chunks):
+    """
+    Descomprime al vuelo los trozos si el cuerpo es gzip, en trozos de como
+    mucho CHUNK_SIZE bytes (un sitemap de 50 000 URLs cabe en unos pocos
+    trozos comprimidos)
+    """
+    chunks = iter(chunks)
+    inflater = None
+    for chunk in chunks:
+        if inflater is None:
+            if chunk[:2] != GZIP_MAGIC:
+                yield chunk
+                yield from chunks
+                return
+            inflater = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        while chunk:
+            yield inflater.decompress(chunk, CHUNK_SIZE)
+            chunk = inflater.unconsumed_tail
+    if inflater is not None:
+        yield inflater.flush()
+
+
+class SitemapSeeder:
+    """
+    Descubre las URLs de un sitio en sus sitemaps antes de empezar el rastreo.
+
+    Lee las líneas 'Sitemap:' de /robots.txt (o prueba /sitemap.xml si no
+    hay ninguna), sigue los índices de sitemaps y devuelve las URLs del mismo
+    host ya normalizadas con su lastmod. Las peticiones pasan por el escáner,
+    de modo que respetan el ritmo por host y quedan en las métricas.
+
+    Args:
+        scanner: WebSpectreScanner que hace las peticiones y filtra las URLs
+        max_urls: Máximo de URLs devueltas
+    """
+
+    def __init__(self, scanner, max_urls=50000):
+        self.scanner = scanner
+        self.max_urls = max_urls
+
+    def discover(self, start_url: str) -> list:
+        """Sitemaps declarados en robots.txt, o /sitemap.xml si no declara ninguno"""
+        parts = urlsplit(start_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        try:
+            response = self.scanner.request('GET', f"{origin}/robots.txt", timeout=15)
+            if response.status_code < 400:
+                sitemaps = parse_robots(response.text, origin)
+                if sitemaps:
+                    return sitemaps
+        except Exception as e:
+            print(f"\n[!] Error al leer {origin}/robots.txt: {str(e)}", flush=True)
+        return [f"{origin}/sitemap.xml"]
+
+    def seed(self, start_url: str) -> list:
+        """
+        Recorre los sitemaps del sitio.
+
+        Returns:
+            Lista de (url, lastmod) sin repetidas, con lastmod como marca de
+            tiempo o None
+        """
+        url_filter = self.scanner.url_filter
+        pending = deque(self.discover(start_url))
+        fetched = set()
+        found = {}
+        while pending and len(fetched) < MAX_SITEMAPS and len(found) < self.max_urls:
+            sitemap = pending.popleft()
+            if sitemap in fetched:
+                continue
+            fetched.add(sitemap)
+            try:
+                for kind, loc, lastmod in self.read(sitemap):
+                    if kind == 'sitemap':
+                        pending.append(urljoin(sitemap, loc))
+                        continue
+                    url = url_filter.normalize(start_url, loc)
+                    if url is not None and url not in found:
+                        found[url] = lastmod
+                        if len(found) >= self.max_urls:
+                            break
+            except Exception as e:
+                print(f"\n[!] Error en el sitemap {sitemap}: {str(e)}", flush=True)
+
+        self.scanner.metrics.inc('sitemap_files', len(fetched))
+        return list(found.items())
+
+    def read(self, sitemap: str):
+        """Descarga un sitemap en streaming y devuelve sus entradas (ver iter_sitemap)"""
+        response = self.scanner.request('GET', sitemap, timeout=30, stream=True)
+        try:
+            # Muchos sitios responden con su página de error HTML y un 200
+            if response.status_code >= 400 or 'html' in response.headers.get('Content-Type', ''):
+                return
+            yield from iter_sitemap(self.chunks(response))
+        finally:
+            response.close()
+
+    def chunks(self, response):
+        """Trozos del cuerpo de una respuesta en streaming, contando los bytes leídos"""
+        for chunk in iter_body(response, CHUNK_SIZE):
+            self.scanner.metrics.inc('http_bytes', len(chunk))
+            yield chunk
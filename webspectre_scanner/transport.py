@@ -0,0 +1,380 @@
+"""
+Transporte HTTP: pool de conexiones configurable, reintentos e instrumentación
+de tiempos de DNS, conexión, primer byte y descarga
+"""
+
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
+
+# Estados que se reintentan cuando hay política de reintentos
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Tiempo de establecimiento de conexión de la petición en curso en cada hilo,
+# para descontarlo del tiempo hasta el primer byte
+_setup = threading.local()
+
+
+class TimedConnectionMixin:
+    """
+    Conexión de urllib3 que resuelve el nombre por separado para medir el DNS
+    y el establecimiento de la conexión en histogramas distintos.
+    """
+
+    metrics = None
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            return super()._new_conn()
+        if not addresses:
+            raise NewConnectionError(self, 'la resolución DNS no devolvió direcciones')
+        resolved = time.perf_counter()
+
+        host = self._dns_host
+        error = None
+        try:
+            # Como create_connection: se prueba cada dirección resuelta en orden,
+            # también si una agota el tiempo (p. ej. una ruta IPv6 rota)
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = host
+
+        finished = time.perf_counter()
+        self.metrics.observe('dns_seconds', resolved - started)
+        self.metrics.observe('connect_seconds', finished - resolved)
+        _setup.seconds = getattr(_setup, 'seconds', 0.0) + (finished - started)
+        return sock
+
+
+class TimedHTTPSConnectionMixin(TimedConnectionMixin):
+    """En HTTPS el handshake TLS ocurre en connect(), después de _new_conn"""
+
+    def connect(self):
+        before = getattr(_setup, 'seconds', 0.0)
+        started = time.perf_counter()
+        super().connect()
+        handshake = time.perf_counter() - started - (_setup.seconds - before)
+        _setup.seconds += handshake
+        self.metrics.observe('tls_seconds', handshake)
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """
+    Adaptador de requests que registra en un ScanMetrics cada petición:
+    tiempos de DNS, conexión y TLS (solo para conexiones nuevas), tiempo hasta
+    el primer byte, tiempo de descarga del cuerpo, bytes, estados y peticiones
+    en curso.
+    """
+
+    def __init__(self, metrics, max_connections=0, **kwargs):
+        self.metrics = metrics
+        # Tope global de peticiones (y por tanto de conexiones) en uso a la vez
+        self.slots = threading.BoundedSemaphore(max_connections) if max_connections > 0 else None
+        self.pool_classes = {
+            'http': type('TimedHTTPConnectionPool', (HTTPConnectionPool,), {
+                'ConnectionCls': type('TimedHTTPConnection', (TimedConnectionMixin, HTTPConnection),
+                                      {'metrics': metrics})
+            }),
+            'https': type('TimedHTTPSConnectionPool', (HTTPSConnectionPool,), {
+                'ConnectionCls': type('TimedHTTPSConnection', (TimedHTTPSConnectionMixin, HTTPSConnection),
+                                      {'metrics': metrics})
+            }),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self.pool_classes
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.poolmanager.pool_classes_by_scheme = self.pool_classes
+
+    def send(self, request, stream=False, **kwargs):
+        metrics = self.metrics
+        if self.slots is not None:
+            self.slots.acquire()
+        metrics.inc('http_requests', method=request.method)
+        metrics.add_gauge('http_in_flight', 1)
+        release = self._release
+        _setup.seconds = 0.0
+        started = time.perf_counter()
+        try:
+            try:
+                response = super().send(request, stream=stream, **kwargs)
+            except Exception:
+                metrics.inc('http_errors')
+                raise
+            headers_at = time.perf_counter()
+            metrics.observe('ttfb_seconds', max(0.0, headers_at - started - _setup.seconds))
+            metrics.inc('http_responses', status=f"{response.status_code // 100}xx")
+
+            if stream:
+                # El cuerpo aún ocupa la conexión: el hueco se libera al cerrar
+                release_on_close(response, release)
+                release = None
+            else:
+                content = response.content
+                metrics.observe('download_seconds', time.perf_counter() - headers_at)
+                metrics.inc('http_bytes', len(content))
+            return response
+        finally:
+            if release is not None:
+                release()
+
+    def _release(self):
+        """Da por terminada una petición: sale de http_in_flight y libera su hueco de max_connections"""
+        self.metrics.add_gauge('http_in_flight', -1)
+        if self.slots is not None:
+            self.slots.release()
+
+
+def release_on_close(response, release):
+    """
+    Aplaza `release` hasta que se cierre una respuesta pedida con stream=True,
+    de modo que la petición cuenta como en curso mientras se descarga el
+    cuerpo. Se llama una sola vez aunque la respuesta se cierre varias veces.
+    """
+    close = response.close
+    pending = [release]
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            if pending:
+                pending.pop()()
+
+    response.close = close_and_release
+
+
+def mount_instrumented(session, metrics, **adapter_kwargs):
+    """Sustituye los adaptadores http/https de una sesión por InstrumentedAdapter"""
+    adapter = InstrumentedAdapter(metrics, **adapter_kwargs)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
+
+
+def retry_policy(retries: int, backoff: float):
+    """
+    Política de reintentos de urllib3 para el adaptador.
+
+    Solo se reintentan GET y HEAD, ante errores de conexión o los estados de
+    RETRY_STATUSES, con espera exponencial (backoff * 2^intento) y respetando
+    Retry-After. Con 0 reintentos se mantiene el comportamiento de requests.
+    """
+    if retries <= 0:
+        return 0
+    return Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+
+def open_session(metrics, pool_size=10, pool_hosts=10, max_connections=0, retries=0,
+                 backoff=0.5, keep_alive=True, http2=False, verify=True):
+    """
+    Crea la sesión HTTP compartida por todos los hilos del escáner.
+
+    Args:
+        metrics: ScanMetrics donde se registran los tiempos
+        pool_size: Conexiones reutilizables por host
+        pool_hosts: Hosts con pool de conexiones propio en memoria
+        max_connections: Peticiones simultáneas en total (0 = sin límite)
+        retries: Reintentos por petición (0 = sin reintentos)
+        backoff: Factor de espera exponencial entre reintentos
+        keep_alive: Reutilizar conexiones entre peticiones
+        http2: Usar httpx con HTTP/2 si está instalado
+        verify: Verificar certificados SSL (solo lo usa la sesión HTTP/2)
+
+    Returns:
+        Un requests.Session o, con http2, un Http2Session con la misma interfaz
+    """
+    if http2:
+        try:
+            return Http2Session(metrics, pool_size, max_connections, retries, keep_alive, verify)
+        except ImportError:
+            print("[!] HTTP/2 no disponible (pip install 'httpx[http2]'): se usa HTTP/1.1")
+
+    session = requests.Session()
+    mount_instrumented(
+        session, metrics,
+        max_connections=max_connections,
+        pool_connections=pool_hosts,
+        pool_maxsize=pool_size,
+        max_retries=retry_policy(retries, backoff)
+    )
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+class Http2Session:
+    """
+    Sesión sobre httpx con HTTP/2 y la parte de la interfaz de requests.Session
+    que usa el escáner: headers, request() y close().
+
+    HTTP/2 se negocia por ALPN, así que solo se aplica a hosts https; el resto
+    sigue en HTTP/1.1. httpx solo reintenta errores de conexión y sin espera
+    entre intentos. La verificación SSL se fija al crear la sesión.
+    """
+
+    def __init__(self, metrics, pool_size=10, max_connections=0, retries=0,
+                 keep_alive=True, verify=True):
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=max_connections or None,
+            max_keepalive_connections=pool_size if keep_alive else 0
+        )
+        transport = httpx.HTTPTransport(http2=True, verify=verify, limits=limits, retries=retries)
+        self.client = httpx.Client(transport=transport, verify=verify)
+        self.headers = self.client.headers
+        self.metrics = metrics
+
+    def request(self, method, url, verify=None, timeout=None, headers=None, allow_redirects=True,
+                stream=False):
+        # Con stream el cuerpo queda sin leer: quien lo lee con iter_body() registra
+        # los bytes y el tiempo de descarga y debe cerrar la respuesta
+        metrics = self.metrics
+        setup = {'seconds': 0.0}
+        marks = {}
+
+        def trace(event, info):
+            # httpcore notifica el inicio y fin de cada fase de la conexión
+            phase, _, state = event.rpartition('.')
+            if state == 'started':
+                marks[phase] = time.perf_counter()
+            elif state == 'complete' and phase in marks:
+                elapsed = time.perf_counter() - marks.pop(phase)
+                if phase == 'connection.connect_tcp':
+                    metrics.observe('connect_seconds', elapsed)
+                    setup['seconds'] += elapsed
+                elif phase == 'connection.start_tls':
+                    metrics.observe('tls_seconds', elapsed)
+                    setup['seconds'] += elapsed
+
+        request = self.client.build_request(
+            method, url, headers=headers, timeout=timeout, extensions={'trace': trace}
+        )
+        metrics.inc('http_requests', method=method)
+        metrics.add_gauge('http_in_flight', 1)
+        in_flight = True
+        started = time.perf_counter()
+        try:
+            try:
+                response = self.client.send(request, stream=True, follow_redirects=allow_redirects)
+            except Exception:
+                metrics.inc('http_errors')
+                raise
+            headers_at = time.perf_counter()
+            metrics.observe('ttfb_seconds', max(0.0, headers_at - started - setup['seconds']))
+            metrics.inc('http_responses', status=f"{response.status_code // 100}xx")
+            metrics.inc('http_version', version=response.http_version)
+            if stream:
+                release_on_close(response, lambda: metrics.add_gauge('http_in_flight', -1))
+                in_flight = False
+                return response
+            try:
+                content = response.read()
+            finally:
+                response.close()
+            metrics.observe('download_seconds', time.perf_counter() - headers_at)
+            metrics.inc('http_bytes', len(content))
+            return response
+        finally:
+            if in_flight:
+                metrics.add_gauge('http_in_flight', -1)
+
+    def close(self):
+        self.client.close()
+
+
+def iter_body(response, chunk_size):
+    """
+    Trozos del cuerpo ya descomprimido de una respuesta pedida con stream=True,
+    sea un requests.Response o, con --http2, un httpx.Response
+    """
+    reader = getattr(response, 'iter_content', None) or response.iter_bytes
+    return reader(chunk_size)
+
+
+def guess_encoding(body: bytes) -> str:
+    """Codificación probable de un cuerpo sin charset declarado (como Response.apparent_encoding)"""
+    detector = requests.compat.chardet
+    if detector is None or not body:
+        return 'utf-8'
+    return detector.detect(body)['encoding'] or 'utf-8'
+
+
+def aiohttp_trace_config(metrics):
+    """
+    TraceConfig de aiohttp que registra los mismos tiempos que InstrumentedAdapter.
+    La descarga del cuerpo la mide quien lee la respuesta.
+    """
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+        context.setup = 0.0
+        metrics.inc('http_requests', method=params.method)
+        metrics.add_gauge('http_in_flight', 1)
+
+    async def on_dns_start(session, context, params):
+        context.dns_started = time.perf_counter()
+
+    async def on_dns_end(session, context, params):
+        elapsed = time.perf_counter() - context.dns_started
+        context.setup += elapsed
+        metrics.observe('dns_seconds', elapsed)
+
+    async def on_connection_start(session, context, params):
+        context.connect_started = time.perf_counter()
+
+    async def on_connection_end(session, context, params):
+        elapsed = time.perf_counter() - context.connect_started
+        context.setup += elapsed
+        metrics.observe('connect_seconds', elapsed)
+
+    async def on_request_end(session, context, params):
+        metrics.add_gauge('http_in_flight', -1)
+        setup = context.setup
+        metrics.observe('ttfb_seconds', max(0.0, time.perf_counter() - context.started - setup))
+        metrics.inc('http_responses', status=f"{params.response.status // 100}xx")
+
+    async def on_request_exception(session, context, params):
+        metrics.add_gauge('http_in_flight', -1)
+        metrics.inc('http_errors')
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_dns_resolvehost_start.append(on_dns_start)
+    trace.on_dns_resolvehost_end.append(on_dns_end)
+    trace.on_connection_create_start.append(on_connection_start)
+    trace.on_connection_create_end.append(on_connection_end)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
@@ -0,0 +1,351 @@
+"""
+Almacén compacto de URLs para rastreos de millones de páginas
+"""
+
+import base64
+import hashlib
+import math
+import sys
+import threading
+from array import array
+
+# Columnas de bits de cada URL
+VISITED = 1
+VALID = 2
+INVALID = 4
+LEAF = 8
+
+# Valor de la columna de estado para URLs sin verificar
+NO_STATUS = -1
+
+# Con el GIL, leer un diccionario o una posición de un bytearray ya es atómico
+# y las consultas no toman el cerrojo; sin GIL (3.13t) lo toman siempre
+LOCKED_READS = not getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+class UrlStore:
+    """
+    Tabla única de URLs internadas, repartida en franjas con cerrojo propio.
+
+    Cada URL se guarda una sola vez como clave de un diccionario que la
+    asocia a un identificador entero; sus marcas (visitada, válida, inválida,
+    hoja) y su código de estado viven en columnas compactas (bytearray y
+    array) indexadas por ese identificador. visited, valid_links,
+    invalid_links, leaf_links y url_status_cache son vistas sobre la tabla.
+
+    La tabla se divide en `stripes` franjas (se redondea a potencia de dos)
+    según el hash de la URL, cada una
+    con su diccionario, sus columnas y su cerrojo: toda lectura o escritura de
+    una URL ocurre bajo el cerrojo de su franja, así que los hilos de páginas
+    y de verificación solo compiten cuando tocan la misma franja y el
+    almacén no depende del GIL (también funciona en intérpretes sin GIL;
+    con GIL las consultas se hacen sin cerrojo, ver LOCKED_READS).
+    Marcar una URL es atómico: add() y claim() devuelven True a un único
+    llamante, que es quien la reclama.
+
+    Con `bloom_fp` el conjunto de visitadas pasa a un filtro de Bloom: las URLs
+    que solo se visitan no se internan, a cambio de una tasa de falsos
+    positivos configurable (alguna URL nueva podría darse por visitada).
+    """
+
+    def __init__(self, bloom_fp=None, bloom_capacity=1000000, stripes=16):
+        count = 1 << max(0, stripes - 1).bit_length()
+        self.stripes = [Stripe(index) for index in range(count)]
+        self.mask = count - 1
+        # Las vistas se crean después de las franjas: copian stripes y mask
+
+        self.valid_links = FlagView(self, VALID)
+        self.invalid_links = FlagView(self, INVALID)
+        self.leaf_links = FlagView(self, LEAF)
+        self.url_status_cache = StatusView(self)
+        if bloom_fp:
+            self.visited = BloomView(self, BloomFilter(bloom_capacity, bloom_fp))
+        else:
+            self.visited = FlagView(self, VISITED)
+
+    def __len__(self):
+        return sum(len(stripe.ids) for stripe in self.stripes)
+
+    def stripe(self, url: str) -> 'Stripe':
+        """Franja que corresponde a una URL"""
+        return self.stripes[hash(url) & self.mask]
+
+    def claim(self, url: str, leaf: bool = False) -> bool:
+        """
+        Marca la URL como visitada y, con `leaf`, como hoja, en un solo paso
+        bajo el cerrojo de su franja: nadie puede verla visitada y aún sin la
+        marca de hoja. Devuelve True solo al llamante que la reclama.
+        """
+        stripe = self.stripe(url)
+        with stripe.lock:
+            if not self.visited.mark(stripe, url):
+                return False
+            if leaf:
+                self.leaf_links.mark(stripe, url)
+            return True
+
+    def is_new(self, url: str) -> bool:
+        """Indica si la URL no se ha visitado o solo se ha verificado (hoja), con una sola lectura de sus marcas"""
+        stripe = self.stripe(url)
+        # Con filtro de Bloom las dos marcas viven en sitios distintos y hay
+        # que leerlas bajo el cerrojo que toma claim()
+        if not LOCKED_READS and isinstance(self.visited, FlagView):
+            return self._unclaimed(stripe, url)
+        with stripe.lock:
+            return self._unclaimed(stripe, url)
+
+    def _unclaimed(self, stripe, url):
+        url_id = stripe.ids.get(url)
+        flags = 0 if url_id is None else stripe.flags[url_id]
+        if flags & LEAF:
+            return True
+        if isinstance(self.visited, FlagView):
+            return not flags & VISITED
+        return url not in self.visited
+
+    def urls(self):
+        """Itera las URLs internadas, copiando cada franja bajo su cerrojo"""
+        for stripe in self.stripes:
+            with stripe.lock:
+                urls = list(stripe.ids)
+            yield from urls
+
+
+class Stripe:
+    """Franja del UrlStore: diccionario URL -> identificador, columnas y cerrojo"""
+
+    __slots__ = ('index', 'ids', 'flags', 'status', 'lock')
+
+    def __init__(self, index: int):
+        self.index = index
+        self.ids = {}
+        self.flags = bytearray()
+        self.status = array('h')
+        self.lock = threading.Lock()
+
+    def intern(self, url: str) -> int:
+        """Devuelve el identificador de la URL, creándolo si no existe (con el cerrojo tomado)"""
+        url_id = self.ids.get(url)
+        if url_id is None:
+            url_id = len(self.flags)
+            self.flags.append(0)
+            self.status.append(NO_STATUS)
+            self.ids[url] = url_id
+        return url_id
+
+
+class FlagView:
+    """Vista con interfaz de conjunto sobre una columna de marcas del UrlStore"""
+
+    def __init__(self, store: UrlStore, flag: int):
+        self.store = store
+        self.stripes = store.stripes
+        self.mask = store.mask
+        self.flag = flag
+        # Un contador por franja, que solo cambia bajo el cerrojo de esa franja
+        self.counts = [0] * len(store.stripes)
+
+    def __contains__(self, url):
+        stripe = self.stripes[hash(url) & self.mask]
+        if not LOCKED_READS:
+            return self._marked(stripe, url)
+        with stripe.lock:
+            return self._marked(stripe, url)
+
+    def _marked(self, stripe, url):
+        url_id = stripe.ids.get(url)
+        return url_id is not None and bool(stripe.flags[url_id] & self.flag)
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def __iter__(self):
+        flag = self.flag
+        for stripe in self.store.stripes:
+            with stripe.lock:
+                flags = stripe.flags
+                urls = [url for url, url_id in stripe.ids.items() if flags[url_id] & flag]
+            yield from urls
+
+    def add(self, url) -> bool:
+        """Marca la URL y devuelve True si no lo estaba (solo a un llamante)"""
+        stripe = self.stripes[hash(url) & self.mask]
+        with stripe.lock:
+            return self.mark(stripe, url)
+
+    def mark(self, stripe, url) -> bool:
+        """Como add() pero con el cerrojo de la franja ya tomado"""
+        url_id = stripe.intern(url)
+        if stripe.flags[url_id] & self.flag:
+            return False
+        stripe.flags[url_id] |= self.flag
+        self.counts[stripe.index] += 1
+        return True
+
+    def discard(self, url) -> bool:
+        """Desmarca la URL y devuelve True si estaba marcada (solo a un llamante)"""
+        stripe = self.stripes[hash(url) & self.mask]
+        with stripe.lock:
+            url_id = stripe.ids.get(url)
+            if url_id is None or not stripe.flags[url_id] & self.flag:
+                return False
+            stripe.flags[url_id] &= ~self.flag
+            self.counts[stripe.index] -= 1
+            return True
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def dump(self):
+        """Contenido serializable para un punto de control"""
+        return list(self)
+
+    def load(self, data):
+        """Restaura el contenido guardado por dump"""
+        if isinstance(data, dict):
+            raise ValueError("El punto de control usa filtro de Bloom: reanudar con --bloom-fp")
+        self.update(data)
+
+
+class StatusView:
+    """Vista con interfaz de diccionario url -> (is_valid, status) sobre la columna de estado"""
+
+    def __init__(self, store: UrlStore):
+        self.store = store
+        self.stripes = store.stripes
+        self.mask = store.mask
+
+    def __contains__(self, url):
+        return self.get(url) is not None
+
+    def __getitem__(self, url):
+        result = self.get(url)
+        if result is None:
+            raise KeyError(url)
+        return result
+
+    def __setitem__(self, url, value):
+        is_valid, status = value
+        stripe = self.stripes[hash(url) & self.mask]
+        with stripe.lock:
+            stripe.status[stripe.intern(url)] = status
+
+    def __len__(self):
+        total = 0
+        for stripe in self.store.stripes:
+            with stripe.lock:
+                total += len(stripe.status) - stripe.status.count(NO_STATUS)
+        return total
+
+    def get(self, url, default=None):
+        stripe = self.stripes[hash(url) & self.mask]
+        if LOCKED_READS:
+            with stripe.lock:
+                status = self._status(stripe, url)
+        else:
+            status = self._status(stripe, url)
+        if status == NO_STATUS:
+            return default
+        return (0 < status < 400, status)
+
+    @staticmethod
+    def _status(stripe, url):
+        url_id = stripe.ids.get(url)
+        return NO_STATUS if url_id is None else stripe.status[url_id]
+
+    def items(self):
+        for stripe in self.store.stripes:
+            with stripe.lock:
+                statuses = stripe.status
+                items = [(url, statuses[url_id]) for url, url_id in stripe.ids.items()
+                         if statuses[url_id] != NO_STATUS]
+            for url, status in items:
+                yield url, (0 < status < 400, status)
+
+
+class BloomFilter:
+    """Filtro de Bloom dimensionado para `capacity` elementos con tasa de falsos positivos `fp_rate`"""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.size = max(8, int(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item) -> bool:
+        """Añade un elemento y devuelve True si no estaba (salvo falso positivo)"""
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        return added
+
+
+class BloomView:
+    """
+    Conjunto de visitadas respaldado por un filtro de Bloom.
+
+    Solo guarda las cadenas de las URLs ya internadas en el UrlStore (las
+    clasificadas), así que iterar devuelve esas URLs y no todas las visitadas.
+    """
+
+    def __init__(self, store: UrlStore, bloom: BloomFilter):
+        self.store = store
+        self.bloom = bloom
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __contains__(self, url):
+        return url in self.bloom
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.store.urls()
+
+    def add(self, url) -> bool:
+        with self.lock:
+            if self.bloom.add(url):
+                self.count += 1
+                return True
+            return False
+
+    def mark(self, stripe, url) -> bool:
+        """Como add(); la franja no se usa porque el filtro tiene su propio cerrojo"""
+        return self.add(url)
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def dump(self):
+        return {
+            'capacity': self.bloom.capacity,
+            'fp_rate': self.bloom.fp_rate,
+            'count': self.count,
+            'bits': base64.b64encode(bytes(self.bloom.bits)).decode('ascii')
+        }
+
+    def load(self, data):
+        if isinstance(data, list):
+            self.update(data)
+            return
+        self.bloom = BloomFilter(data['capacity'], data['fp_rate'])
+        self.bloom.bits = bytearray(base64.b64decode(data['bits']))
+        self.count = data['count']
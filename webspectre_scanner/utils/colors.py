@@ -30,9 +30,10 @@ def print_shaded_text(text, start_color=None, end_color=None):
     start_color = start_color or Color(0, 80, 0)    # Verde oscuro
     end_color = end_color or Color(0, 255, 127)     # Verde claro
     
+    # Se compone la línea completa y se escribe de una vez
+    chunks = []
     for index, char in enumerate(text):
         alpha = index / max(len(text) - 1, 1)
         color = Color.lerp(start_color, end_color, alpha)
-        color_code = f"\033[38;2;{color.red};{color.green};{color.blue}m"
-        sys.stdout.write(f"{color_code}{char}\033[0m")
-    sys.stdout.write("\n")
+        chunks.append(f"\033[38;2;{color.red};{color.green};{color.blue}m{char}\033[0m")
+    sys.stdout.write(''.join(chunks) + "\n")
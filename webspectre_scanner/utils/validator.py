@@ -2,7 +2,8 @@
 Módulo para validación de URLs y otros inputs
 """
 
-from urllib.parse import urlparse
+import re
+from urllib.parse import urljoin, urlparse
 from typing import Optional
 
 def validate_url(url: str) -> str:
@@ -42,6 +43,10 @@ def validate_url(url: str) -> str:
     
     return normalized_url
 
+# Extensiones y esquemas que nunca se rastrean ni se verifican
+EXCLUDED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.css', '.js', '.pdf', '.svg')
+EXCLUDED_SCHEMES = ('javascript:', 'mailto:', 'tel:', '#', 'data:')
+
 def is_excluded_url(url: str, exclude_patterns: list) -> bool:
     """
     Determina si una URL debe ser excluida del escaneo.
@@ -53,16 +58,151 @@ def is_excluded_url(url: str, exclude_patterns: list) -> bool:
     Returns:
         True si la URL debe ser excluida, False en caso contrario
     """
-    excluded_ext = ['.jpg', '.jpeg', '.png', '.gif', '.css', '.js', '.pdf', '.svg']
-    excluded_schemes = ['javascript:', 'mailto:', 'tel:', '#', 'data:']
-    
     if any(pattern in url for pattern in exclude_patterns):
         return True
         
-    if any(url.endswith(ext) for ext in excluded_ext):
-        return True
-        
-    if any(url.startswith(scheme) for scheme in excluded_schemes):
-        return True
-        
-    return False
+    return url.endswith(EXCLUDED_EXTENSIONS) or url.startswith(EXCLUDED_SCHEMES)
+
+class UrlFilter:
+    """
+    Filtro de enlaces compilado una sola vez al crear el escáner.
+
+    Aplica las mismas reglas que is_excluded_url (patrones de ruta en
+    cualquier parte del enlace, extensiones y esquemas) más la de mismo host,
+    con los patrones en una única expresión regular y normalizando todos los
+    enlaces de una página en una llamada. Además admite expresiones
+    regulares del usuario sobre la URL absoluta: si hay de inclusión, la URL
+    debe cumplir alguna, y no debe cumplir ninguna de exclusión.
+
+    Con un Canonicalizer cada URL se devuelve en forma canónica y el host se
+    compara ya canonicalizado, de modo que las variantes de una misma URL
+    llegan como una sola a visited.
+
+    Args:
+        exclude_paths: Patrones literales que excluyen un enlace si aparecen en él
+        include: Expresiones regulares que debe cumplir la URL normalizada
+        exclude: Expresiones regulares que excluyen la URL normalizada
+        canonicalizer: Canonicalizer a aplicar a cada URL, o None
+    """
+
+    def __init__(self, exclude_paths=(), include=(), exclude=(), canonicalizer=None):
+        self.canonicalizer = canonicalizer
+        self.exclude_paths = list(exclude_paths)
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.path_regex = _alternation([re.escape(pattern) for pattern in self.exclude_paths])
+        self.include_regex = _alternation(self.include)
+        self.exclude_regex = _alternation(self.exclude)
+
+    def is_excluded(self, link: str) -> bool:
+        """Equivalente a is_excluded_url(link, exclude_paths)"""
+        if self.path_regex is not None and self.path_regex.search(link):
+            return True
+        return link.endswith(EXCLUDED_EXTENSIONS) or link.startswith(EXCLUDED_SCHEMES)
+
+    def allows(self, url: str) -> bool:
+        """Aplica las expresiones de inclusión y exclusión del usuario a una URL absoluta"""
+        if self.include_regex is not None and not self.include_regex.search(url):
+            return False
+        return self.exclude_regex is None or not self.exclude_regex.search(url)
+
+    def canonicalize(self, url: str) -> str:
+        """Forma canónica de una URL absoluta (la propia URL sin canonicalizador)"""
+        if self.canonicalizer is None:
+            return url
+        return self.canonicalizer.canonical(url)
+
+    def normalize(self, base_url: str, link: str):
+        """Normaliza un único enlace; devuelve la URL absoluta o None"""
+        found = self.normalize_all(base_url, [link])
+        return found[0] if found else None
+
+    def normalize_all(self, base_url: str, links) -> list:
+        """
+        Normaliza todos los enlaces de una página, en orden y con repeticiones.
+
+        La URL base se analiza una sola vez y cada enlace distinto se resuelve
+        una sola vez por página (los menús repiten los mismos enlaces). Los
+        enlaces absolutos desde la raíz y los absolutos al mismo host sin
+        segmentos especiales se resuelven sin urljoin; el resultado es idéntico.
+        """
+        base = urlparse(base_url)
+        host = self._host(base)
+        scheme = base.scheme if self.canonicalizer is None else base.scheme.lower()
+        page = (base_url, scheme, host, f"{scheme}://{host}")
+        resolved = {}
+        found = []
+        for link in links:
+            url = resolved.get(link, False)
+            if url is False:
+                url = resolved[link] = self._resolve(page, link)
+            if url is not None:
+                found.append(url)
+        return found
+
+    def _host(self, parsed):
+        if self.canonicalizer is None:
+            return parsed.netloc
+        return self.canonicalizer.netloc(parsed.scheme.lower(), parsed.netloc)
+
+    def _resolve(self, page, link):
+        if not link or self.is_excluded(link):
+            return None
+
+        base_url, scheme, host, origin = page
+        canonicalizer = self.canonicalizer
+        # Con parámetros de query a conservar hace falta la URL completa
+        path = None
+        if canonicalizer is None or not canonicalizer.keep_params:
+            if link.startswith(origin + '/'):
+                path = _plain_path(link[len(origin):])
+            elif link[:1] == '/' and link[1:2] != '/':
+                path = _plain_path(link)
+
+        if path is not None:
+            if canonicalizer is not None:
+                path = canonicalizer.path(path)
+            url = origin + path
+        else:
+            parsed = urlparse(urljoin(base_url, link))
+            if self._host(parsed) != host:
+                return None
+            if canonicalizer is None:
+                url = parsed._replace(query="", fragment="").geturl()
+            else:
+                path = f"{parsed.path};{parsed.params}" if parsed.params else parsed.path
+                url = canonicalizer.canonical_parts(parsed.scheme, parsed.netloc, path, parsed.query, scheme)
+        return url if self.allows(url) else None
+
+def _plain_path(path):
+    """
+    Ruta sin query ni fragmento si urljoin la dejaría intacta (sin segmentos
+    vacíos, '.' o '..', parámetros ';' ni caracteres que urlparse elimina), o None
+    """
+    end = len(path)
+    for separator in '?#':
+        index = path.find(separator)
+        if index != -1 and index < end:
+            end = index
+    path = path[:end]
+    if '/.' in path or '//' in path or ';' in path or '\t' in path or '\r' in path or '\n' in path:
+        return None
+    return path
+
+def _alternation(patterns):
+    """Compila varias expresiones regulares en una sola, o None si no hay ninguna"""
+    if not patterns:
+        return None
+    return re.compile('|'.join(f"(?:{pattern})" for pattern in patterns))
+
+def parse_address(value: str) -> tuple:
+    """
+    Convierte una dirección HOST:PORT en la tupla (host, port).
+
+    Raises:
+        ValueError: Si falta el puerto o no es un número válido
+    """
+    host, sep, port = (value or '').rpartition(':')
+    if not sep or not port.isdigit() or not 0 <= int(port) <= 65535:
+        raise ValueError(f"Dirección inválida (se esperaba HOST:PORT): {value}")
+    return host.strip('[]') or '0.0.0.0', int(port)
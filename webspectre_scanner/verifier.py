@@ -0,0 +1,130 @@
+"""
+Etapa concurrente de verificación de enlaces
+"""
+
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+
+class HostQueue:
+    """
+    Cola de trabajos agrupada por host que reparte turnos en round-robin y
+    limita cuántos trabajos de un mismo host pueden estar en vuelo a la vez.
+    """
+
+    def __init__(self, per_host=4):
+        self.per_host = max(1, per_host)
+        self.queues = OrderedDict()
+        self.in_flight = Counter()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, url, item):
+        """Encola un trabajo asociado al host de la URL"""
+        host = urlparse(url).netloc
+        self.queues.setdefault(host, deque()).append(item)
+        self._size += 1
+
+    def items(self):
+        """Todos los trabajos encolados, sin consumirlos"""
+        return [item for items in self.queues.values() for item in items]
+
+    def pop_ready(self):
+        """Devuelve (host, trabajo) del siguiente host con capacidad libre, o None"""
+        for host in list(self.queues):
+            if self.in_flight[host] >= self.per_host:
+                continue
+
+            items = self.queues[host]
+            item = items.popleft()
+            self._size -= 1
+            if items:
+                self.queues.move_to_end(host)
+            else:
+                del self.queues[host]
+
+            self.in_flight[host] += 1
+            return host, item
+        return None
+
+    def done(self, host):
+        """Libera el hueco en vuelo de un host"""
+        self.in_flight[host] -= 1
+        if self.in_flight[host] <= 0:
+            del self.in_flight[host]
+
+
+class LinkVerifier:
+    """
+    Verifica enlaces en un pool de hilos propio para que el coordinador de
+    scan_site no quede bloqueado haciendo HEAD en serie.
+
+    Los enlaces se envían por lotes con submit_many y los resultados se
+    recogen con poll como tuplas (url, depth, is_valid, status).
+    """
+
+    def __init__(self, check, max_workers=10, per_host=4):
+        self.check = check
+        self.max_workers = max(1, max_workers)
+        self.pending = HostQueue(per_host)
+        self.futures = {}
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def busy(self):
+        """Indica si quedan enlaces pendientes o en verificación"""
+        return bool(self.futures) or len(self.pending) > 0
+
+    def pending_links(self):
+        """Enlaces encolados o en verificación como pares (url, depth)"""
+        in_flight = [(url, depth) for _, url, depth in self.futures.values()]
+        return self.pending.items() + in_flight
+
+    def submit_many(self, links):
+        """Encola un lote de pares (url, depth) para verificar"""
+        for url, depth in links:
+            self.pending.push(url, (url, depth))
+        self._dispatch()
+
+    def poll(self, timeout=0):
+        """
+        Recoge las verificaciones terminadas.
+
+        Args:
+            timeout: Segundos a esperar por al menos un resultado (None = sin límite)
+
+        Returns:
+            Lista de tuplas (url, depth, is_valid, status)
+        """
+        if not self.futures:
+            return []
+
+        done, _ = wait(self.futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        results = []
+        for future in done:
+            host, url, depth = self.futures.pop(future)
+            self.pending.done(host)
+            is_valid, status = future.result()
+            results.append((url, depth, is_valid, status))
+
+        self._dispatch()
+        return results
+
+    def _dispatch(self):
+        while len(self.futures) < self.max_workers:
+            ready = self.pending.pop_ready()
+            if ready is None:
+                return
+            host, (url, depth) = ready
+            self.futures[self.executor.submit(self.check, url)] = (host, url, depth)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)